@@ -61,6 +61,9 @@ ANTHROPIC_API_KEY = os.environ.get('ANTHROPIC_API_KEY')
 AWS_REGION = os.environ.get('AWS_REGION') or os.environ.get('AWS_DEFAULT_REGION') or 'us-east-1'
 MAX_TOKENS = 8000
 MAX_RETRIES = 2
+# Local dev only: LLM_CACHE=1 reuses the digest for an identical prompt for up
+# to an hour, so re-running the pipeline on unchanged feeds skips the LLM call.
+LLM_CACHE = os.environ.get('LLM_CACHE') == '1'
 
 DEFAULT_CLAUDE_API_MODEL = 'claude-haiku-4-5-20251001'
 DEFAULT_BEDROCK_CLAUDE_MODEL = 'global.anthropic.claude-haiku-4-5-20251001-v1:0'
@@ -1,6 +1,15 @@
 from core.config import CATEGORY_EMOJIS, CATEGORY_ZH_TO_RSS
 
 
+def _parse_ref(ref):
+    """Return the 1-based article number from "3" or legacy "Tech:3", or None if malformed."""
+    ref = str(ref).strip()
+    if ref.isdecimal():
+        return int(ref)
+    tail = ref[ref.rfind(':') + 1:].strip()
+    return int(tail) if tail.isdecimal() else None
+
+
 def resolve_references(parsed_json, all_articles):
     """
     Resolve ref fields in the LLM JSON 'sections' output to full article data.
@@ -16,47 +25,51 @@ def resolve_references(parsed_json, all_articles):
     """
     sections = []
     for section in parsed_json.get('sections', []):
-        if not isinstance(section, dict):
-            print(f"⚠️ Skipping malformed section (expected dict, got {type(section).__name__}): {section!r:.80}")
-            continue
-        category = section.get('category', '')
-        emoji = CATEGORY_EMOJIS.get(category, '')
-        rss_key = CATEGORY_ZH_TO_RSS.get(category, '')
+        resolved = _resolve_section(section, all_articles)
+        if resolved is not None:
+            sections.append(resolved)
+    return sections
+
+
+def _resolve_section(section, all_articles):
+    """Resolve one LLM section; returns None if it is malformed or has an unknown category."""
+    if not isinstance(section, dict):
+        print(f"⚠️ Skipping malformed section (expected dict, got {type(section).__name__}): {section!r:.80}")
+        return None
+    category = section.get('category', '')
+    emoji = CATEGORY_EMOJIS.get(category, '')
+    rss_key = CATEGORY_ZH_TO_RSS.get(category, '')
+
+    if not rss_key:
+        print(f"⚠️ Unknown category: {category}")
+        return None
+
+    cat_articles = all_articles.get(rss_key, [])
+    by_idx = dict(enumerate(cat_articles, 1))
+    resolved_items = []
 
-        if not rss_key:
-            print(f"⚠️ Unknown category: {category}")
+    for item in section.get('items', []):
+        ref = item.get('ref', '')
+        idx = _parse_ref(ref)
+        if idx is None:
+            print(f"⚠️ Invalid ref: {ref} in {category}")
+            continue
+        original = by_idx.get(idx)
+        if original is None:
+            print(f"⚠️ Ref {ref} out of range in {category} (have {len(cat_articles)} articles)")
             continue
 
-        cat_articles = all_articles.get(rss_key, [])
-        resolved_items = []
-
-        for item in section.get('items', []):
-            ref = item.get('ref', '')
-            idx_str = ref.rsplit(':', 1)[-1] if ':' in ref else ref
-            try:
-                idx = int(idx_str)
-            except ValueError:
-                print(f"⚠️ Invalid ref: {ref} in {category}")
-                continue
-            if idx < 1 or idx > len(cat_articles):
-                print(f"⚠️ Ref {ref} out of range in {category} (have {len(cat_articles)} articles)")
-                continue
-
-            original = cat_articles[idx - 1]
-            resolved = {
-                'title_zh': item.get('title_zh', ''),
-                'summary_zh': item.get('summary_zh', ''),
-                'link': original.get('link', ''),
-                'title': original.get('title', ''),
-                'source': original.get('source', ''),
-                'published': original.get('published', ''),
-                'image_url': original.get('image_url'),
-            }
-            resolved_items.append(resolved)
-
-        sections.append({'category': category, 'emoji': emoji, 'items': resolved_items})
+        resolved_items.append({
+            'title_zh': item.get('title_zh', ''),
+            'summary_zh': item.get('summary_zh', ''),
+            'link': original.get('link', ''),
+            'title': original.get('title', ''),
+            'source': original.get('source', ''),
+            'published': original.get('published', ''),
+            'image_url': original.get('image_url'),
+        })
 
-    return sections
+    return {'category': category, 'emoji': emoji, 'items': resolved_items}
 
 
 def resolve_market_pulse(parsed_json, stock_articles):
@@ -74,17 +87,17 @@ def resolve_market_pulse(parsed_json, stock_articles):
     if not pulse or not isinstance(pulse, dict):
         return None
 
+    by_idx = dict(enumerate(stock_articles, 1))
     related = []
     for ref in pulse.get('refs', []):
-        try:
-            idx = int(str(ref).rsplit(':', 1)[-1])
-        except ValueError:
+        idx = _parse_ref(ref)
+        if idx is None:
             print(f"⚠️ Invalid market_pulse ref: {ref}")
             continue
-        if idx < 1 or idx > len(stock_articles):
+        original = by_idx.get(idx)
+        if original is None:
             print(f"⚠️ market_pulse ref {ref} out of range (have {len(stock_articles)} stock articles)")
             continue
-        original = stock_articles[idx - 1]
         related.append({
             'title': original.get('title', ''),
             'link': original.get('link', ''),
@@ -0,0 +1,101 @@
+"""
+On-disk cache of raw RSS responses for HTTP conditional GETs.
+
+Each feed URL maps to two files under CACHE_DIR, named by a hash of the URL:
+<key>.xml holds the last response body and <key>.json its validators
+(ETag / Last-Modified), fetch time, and the headers feedparser needs to
+re-parse it. Entries younger than FRESH_SECONDS are reused without any
+network request, which keeps repeated local runs from re-fetching.
+<key>.parsed.json holds the parsed fields of that body, tagged with the body's
+digest, so an unchanged feed (fresh, 304, or identical 200) skips parsing too.
+"""
+
+import hashlib
+import json
+import time
+from pathlib import Path
+
+CACHE_DIR = Path(__file__).parent.parent.parent / 'generated' / 'rss_cache'
+FRESH_SECONDS = 30 * 60
+
+
+def _cache_key(url):
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()[:32]
+
+
+def load_cached_feed(url):
+    """
+    Return the cached response for url, or None if absent/unreadable.
+
+    Returns:
+        dict: {etag, last_modified, fetched_at, headers, body} — body is raw bytes
+    """
+    key = _cache_key(url)
+    try:
+        meta = json.loads((CACHE_DIR / f'{key}.json').read_text(encoding='utf-8'))
+        meta['body'] = (CACHE_DIR / f'{key}.xml').read_bytes()
+    except (OSError, ValueError):
+        return None
+    return meta
+
+
+def is_fresh(cached):
+    """True if the cached entry was fetched or revalidated within FRESH_SECONDS."""
+    return time.time() - cached.get('fetched_at', 0) < FRESH_SECONDS
+
+
+def save_cached_feed(url, body, headers, etag=None, last_modified=None):
+    """Persist a 200 response for TTL reuse and later conditional GETs."""
+    key = _cache_key(url)
+    meta = {
+        'url': url,
+        'etag': etag,
+        'last_modified': last_modified,
+        'fetched_at': time.time(),
+        'headers': headers,
+    }
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # Body first: a crash in between leaves old validators pointing at a
+        # newer body, which only costs one extra full download.
+        (CACHE_DIR / f'{key}.xml').write_bytes(body)
+        (CACHE_DIR / f'{key}.json').write_text(json.dumps(meta), encoding='utf-8')
+    except OSError as e:
+        print(f"⚠️ Failed to cache {url}: {e}")
+
+
+def touch_cached_feed(url, cached):
+    """Restart the freshness window after a 304, leaving the stored body untouched."""
+    meta = {k: v for k, v in cached.items() if k != 'body'}
+    meta['fetched_at'] = time.time()
+    try:
+        (CACHE_DIR / f'{_cache_key(url)}.json').write_text(json.dumps(meta), encoding='utf-8')
+    except OSError as e:
+        print(f"⚠️ Failed to cache {url}: {e}")
+
+
+def body_digest(body):
+    """Content hash used to tie a cached parse to the exact body it came from."""
+    return hashlib.sha256(body).hexdigest()
+
+
+def load_parsed_feed(url, digest):
+    """Return the cached parse for url if it was made from a body with this digest, else None."""
+    try:
+        data = json.loads((CACHE_DIR / f'{_cache_key(url)}.parsed.json').read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+    if data.get('digest') != digest:
+        return None
+    return data
+
+
+def save_parsed_feed(url, digest, data):
+    """Persist a JSON-serializable parse of url's body, replacing any older one."""
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        (CACHE_DIR / f'{_cache_key(url)}.parsed.json').write_text(
+            json.dumps({**data, 'digest': digest}), encoding='utf-8',
+        )
+    except OSError as e:
+        print(f"⚠️ Failed to cache parsed {url}: {e}")
@@ -0,0 +1,318 @@
+"""
+Fast path for parsing plain RSS 2.0, RSS 1.0 (RDF) and Atom feeds.
+
+Every configured feed is a simple RSS 2.0, RDF or Atom document, and the pipeline
+only reads a handful of fields from each item. A single ElementTree (expat)
+pass over those fields is several times cheaper than feedparser's full parse.
+Anything unexpected — other roots, XML errors, undeclared entities, XHTML
+text constructs, items without a title, absolute link or parseable date —
+falls back to feedparser, so output never gets worse than before. Relative
+links are left to feedparser because it resolves them against xml:base and
+the feed URL.
+
+Whichever parser ran, the fields the pipeline reads are cached per feed URL
+alongside the raw body (see feed_cache); an unchanged body is not parsed again.
+"""
+
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from email.utils import mktime_tz, parsedate_tz
+from urllib.parse import urlsplit
+
+import feedparser
+from feedparser import FeedParserDict
+
+from core.feed_cache import body_digest, load_parsed_feed, save_parsed_feed
+
+_MEDIA_NS = '{http://search.yahoo.com/mrss/}'
+_CONTENT_ENCODED = '{http://purl.org/rss/1.0/modules/content/}encoded'
+_ATOM_NS = '{http://www.w3.org/2005/Atom}'
+_RDF_ROOT = '{http://www.w3.org/1999/02/22-rdf-syntax-ns#}RDF'
+_RSS1_NS = '{http://purl.org/rss/1.0/}'
+_DC_DATE = '{http://purl.org/dc/elements/1.1/}date'
+# Stored with every cached parse: bump it whenever parse output changes, so
+# parses cached by an older version are redone instead of reused.
+_PARSE_VERSION = 4
+
+
+def parse_feed(body, headers):
+    """
+    Parse a downloaded feed body.
+
+    Args:
+        body: raw feed bytes
+        headers: lowercase response headers (content-type, content-location)
+
+    Returns:
+        FeedParserDict with `bozo`, `feed.title` and `entries`, shaped like
+        feedparser's result for the fields the pipeline reads
+    """
+    # content-location is the feed URL, for fresh downloads and cache hits alike.
+    url = headers.get('content-location')
+    digest = f'{_PARSE_VERSION}:{body_digest(body)}' if url else None
+    if url:
+        cached = load_parsed_feed(url, digest)
+        if cached is not None:
+            return _from_cache(cached)
+
+    parsed = _parse_fast(body)
+    if parsed is None:
+        # Summaries are tag-stripped and everything is escaped at render time,
+        # so feedparser's HTML sanitizer pass is redundant work. Rewriting
+        # relative URIs inside that HTML is too: extract_image_url resolves the
+        # one <img src> it uses. Entry links are resolved either way.
+        parsed = feedparser.parse(
+            body, response_headers=headers, sanitize_html=False, resolve_relative_uris=False,
+        )
+    if url and parsed.entries:
+        save_parsed_feed(url, digest, _to_cache(parsed))
+    return parsed
+
+
+def _parse_fast(body):
+    """Return a feedparser-shaped result for a plain RSS 2.0, RDF or Atom body, or None to fall back."""
+    try:
+        root = ET.fromstring(body)
+    except (ET.ParseError, TypeError, ValueError):
+        return None
+    if root.tag == 'rss':
+        return _parse_rss2(root)
+    if root.tag == f'{_ATOM_NS}feed':
+        return _parse_atom(root)
+    if root.tag == _RDF_ROOT:
+        return _parse_rdf(root)
+    return None
+
+
+def _parse_rss2(root):
+    channel = root.find('channel')
+    if channel is None:
+        return None
+
+    entries = []
+    for item in channel.iter('item'):
+        entry = _parse_item(item)
+        if entry is None:
+            return None
+        entries.append(entry)
+
+    return FeedParserDict(
+        bozo=False,
+        feed=FeedParserDict(title=(channel.findtext('title') or '').strip()),
+        entries=entries,
+    )
+
+
+def _parse_item(item):
+    title = item.findtext('title')
+    link = (item.findtext('link') or '').strip()
+    published_parsed = _parse_date(item.findtext('pubDate'))
+    if title is None or not _is_absolute(link) or published_parsed is None:
+        return None
+
+    encoded = item.findtext(_CONTENT_ENCODED)
+    description = item.findtext('description')
+    entry = FeedParserDict(
+        title=title.strip(),
+        link=link,
+        published_parsed=published_parsed,
+        # feedparser falls back to the full content when there is no description.
+        summary=description if description is not None else encoded or '',
+    )
+    _add_media(entry, item)
+    if encoded:
+        entry['content'] = [{'value': encoded}]
+    return entry
+
+
+def _parse_atom(root):
+    title_el = root.find(f'{_ATOM_NS}title')
+    if title_el is None or _is_xhtml(title_el):
+        return None
+
+    entries = []
+    for el in root.iter(f'{_ATOM_NS}entry'):
+        entry = _parse_atom_entry(el)
+        if entry is None:
+            return None
+        entries.append(entry)
+
+    return FeedParserDict(
+        bozo=False,
+        feed=FeedParserDict(title=(title_el.text or '').strip()),
+        entries=entries,
+    )
+
+
+def _parse_atom_entry(el):
+    title_el = el.find(f'{_ATOM_NS}title')
+    summary_el = el.find(f'{_ATOM_NS}summary')
+    content_el = el.find(f'{_ATOM_NS}content')
+    # XHTML text constructs carry child elements that only feedparser flattens faithfully.
+    if any(c is not None and _is_xhtml(c) for c in (title_el, summary_el, content_el)):
+        return None
+    link = _atom_link(el)
+    published_parsed = _parse_iso_date(el.findtext(f'{_ATOM_NS}published'))
+    updated_parsed = _parse_iso_date(el.findtext(f'{_ATOM_NS}updated'))
+    if title_el is None or not _is_absolute(link) or not (published_parsed or updated_parsed):
+        return None
+
+    content = content_el.text or '' if content_el is not None else None
+    entry = FeedParserDict(title=(title_el.text or '').strip(), link=link)
+    if published_parsed:
+        entry['published_parsed'] = published_parsed
+    if updated_parsed:
+        entry['updated_parsed'] = updated_parsed
+    # feedparser falls back to the full content when there is no summary.
+    if summary_el is not None:
+        entry['summary'] = summary_el.text or ''
+    elif content is not None:
+        entry['summary'] = content
+    _add_media(entry, el)
+    if content:
+        entry['content'] = [{'value': content}]
+    return entry
+
+
+def _parse_rdf(root):
+    channel = root.find(f'{_RSS1_NS}channel')
+    if channel is None:
+        return None
+
+    entries = []
+    # RSS 1.0 items are siblings of the channel, not children of it.
+    for item in root.iterfind(f'{_RSS1_NS}item'):
+        entry = _parse_rdf_item(item)
+        if entry is None:
+            return None
+        entries.append(entry)
+
+    return FeedParserDict(
+        bozo=False,
+        feed=FeedParserDict(title=(channel.findtext(f'{_RSS1_NS}title') or '').strip()),
+        entries=entries,
+    )
+
+
+def _parse_rdf_item(item):
+    title = item.findtext(f'{_RSS1_NS}title')
+    link = (item.findtext(f'{_RSS1_NS}link') or '').strip()
+    # feedparser reports dc:date as updated_parsed, never published_parsed.
+    updated_parsed = _parse_iso_date(item.findtext(_DC_DATE))
+    if title is None or not _is_absolute(link) or updated_parsed is None:
+        return None
+
+    encoded = item.findtext(_CONTENT_ENCODED)
+    description = item.findtext(f'{_RSS1_NS}description')
+    entry = FeedParserDict(
+        title=title.strip(),
+        link=link,
+        updated_parsed=updated_parsed,
+        summary=description if description is not None else encoded or '',
+    )
+    _add_media(entry, item)
+    if encoded:
+        entry['content'] = [{'value': encoded}]
+    return entry
+
+
+def _add_media(entry, el):
+    # .iter() also picks up media:content nested in media:group, like feedparser.
+    media_content = [
+        {'url': m.get('url')} for m in el.iter(f'{_MEDIA_NS}content') if m.get('url')
+    ]
+    if media_content:
+        entry['media_content'] = media_content
+    media_thumbnail = [
+        {'url': m.get('url')} for m in el.iter(f'{_MEDIA_NS}thumbnail') if m.get('url')
+    ]
+    if media_thumbnail:
+        entry['media_thumbnail'] = media_thumbnail
+
+
+def _is_absolute(link):
+    """True for links with a scheme and host, which feedparser leaves unchanged."""
+    parts = urlsplit(link)
+    return bool(parts.scheme and parts.netloc)
+
+
+def _is_xhtml(el):
+    return el.get('type') == 'xhtml' or len(el) > 0
+
+
+def _atom_link(el):
+    """
+    href of the first rel="alternate" link (rel defaults to alternate), like feedparser.
+
+    The href is returned as written; callers fall back to feedparser unless it
+    is absolute, since resolving it would need xml:base from every ancestor.
+    """
+    for link in el.iterfind(f'{_ATOM_NS}link'):
+        if link.get('rel', 'alternate') == 'alternate' and link.get('href'):
+            return link.get('href').strip()
+    return 
+
+
+def _parse_iso_date(value):
+    """RFC 3339 Atom date → UTC struct_time, or None. Naive times are taken as UTC, like feedparser."""
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(value.strip())
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.utctimetuple()
+
+
+def _parse_date(value):
+    """RFC 822 pubDate → UTC struct_time (same as feedparser's *_parsed), or None."""
+    if not value:
+        return None
+    parts = parsedate_tz(value.strip())
+    if parts is None:
+        return None
+    try:
+        return time.gmtime(mktime_tz(parts))
+    except (OverflowError, ValueError):
+        return None
+
+
+def _to_cache(feed):
+    """Keep only the fields rss.py reads, in JSON-friendly form."""
+    return {
+        'bozo': bool(feed.get('bozo')),
+        'title': feed.feed.get('title'),
+        'entries': [_entry_to_cache(entry) for entry in feed.entries],
+    }
+
+
+def _entry_to_cache(entry):
+    # dict.get sidesteps FeedParserDict's updated_parsed → published_parsed alias.
+    out = {key: dict.get(entry, key) for key in ('title', 'link', 'summary') if key in entry}
+    for key in ('published_parsed', 'updated_parsed'):
+        value = dict.get(entry, key)
+        if value:
+            out[key] = list(value)
+    for key in ('media_content', 'media_thumbnail'):
+        media = entry.get(key)
+        if media:
+            out[key] = [{'url': m.get('url')} for m in media]
+    content = entry.get('content')
+    if content:
+        out['content'] = [{'value': content[0].get('value', '')}]
+    return out
+
+
+def _from_cache(data):
+    entries = []
+    for cached in data['entries']:
+        entry = FeedParserDict(cached)
+        for key in ('published_parsed', 'updated_parsed'):
+            if key in cached:
+                entry[key] = time.struct_time(cached[key])
+        entries.append(entry)
+    feed = FeedParserDict(title=data['title']) if data['title'] is not None else FeedParserDict()
+    return FeedParserDict(bozo=data['bozo'], feed=feed, entries=entries)
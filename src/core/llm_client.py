@@ -1,16 +1,14 @@
+import hashlib
 import json
 import os
+import random
 import re
 import shutil
 import subprocess
 import tempfile
+import time
 from pathlib import Path
 
-import boto3
-from botocore.exceptions import ClientError
-from anthropic import Anthropic, APIStatusError
-from json_repair import repair_json
-
 from core.config import (
     ANTHROPIC_API_KEY,
     AWS_REGION,
@@ -19,13 +17,19 @@ from core.config import (
     DEFAULT_CLAUDE_API_MODEL,
     DEFAULT_CLAUDE_CLI_MODEL,
     DEFAULT_CODEX_CLI_MODEL,
+    LLM_CACHE,
     MAX_RETRIES,
     MAX_TOKENS,
     MODEL,
 )
 
 _PROMPT_PATH = Path(__file__).parent.parent / 'prompts' / 'email_digest.md'
+_LLM_CACHE_DIR = Path(__file__).parent.parent.parent / 'generated' / 'llm_cache'
+_LLM_CACHE_SECONDS = 60 * 60
 _SUPPORTED_BACKENDS = 'BEDROCK_CLAUDE, CLAUDE_API, CLAUDE_CLI, or CODEX_CLI'
+_RETRY_MAX_DELAY = 30
+_FENCE_HEAD = re.compile(r'^```\w*\n?')
+_FENCE_TAIL = re.compile(r'\n?```$')
 
 _FORMAT_INSTRUCTIONS = """只输出一个 JSON 对象，无 markdown、无其他文字。
 
@@ -44,6 +48,69 @@ _FORMAT_INSTRUCTIONS = """只输出一个 JSON 对象，无 markdown、无其他
   }
 }"""
 
+# Claude API returns the digest through a forced tool call, so the API hands
+# back an already-parsed object instead of text that may need repair.
+_REF_SCHEMA = {'type': ['string', 'integer']}
+_DIGEST_TOOL = {
+    'name': 'emit_digest',
+    'description': 'Return the finished digest: regular sections plus optional market_pulse.',
+    'input_schema': {
+        'type': 'object',
+        'properties': {
+            'sections': {
+                'type': 'array',
+                'items': {
+                    'type': 'object',
+                    'properties': {
+                        'category': {'type': 'string'},
+                        'items': {
+                            'type': 'array',
+                            'items': {
+                                'type': 'object',
+                                'properties': {
+                                    'ref': _REF_SCHEMA,
+                                    'title_zh': {'type': 'string'},
+                                    'summary_zh': {'type': 'string'},
+                                },
+                                'required': ['ref', 'title_zh', 'summary_zh'],
+                            },
+                        },
+                    },
+                    'required': ['category', 'items'],
+                },
+            },
+            'market_pulse': {
+                'type': ['object', 'null'],
+                'properties': {
+                    'summary': {'type': 'string'},
+                    'drivers': {
+                        'type': 'array',
+                        'items': {
+                            'type': 'object',
+                            'properties': {'title': {'type': 'string'}, 'detail': {'type': 'string'}},
+                            'required': ['title', 'detail'],
+                        },
+                    },
+                    'watch': {'type': 'array', 'items': {'type': 'string'}},
+                    'refs': {'type': 'array', 'items': _REF_SCHEMA},
+                },
+            },
+        },
+        'required': ['sections'],
+    },
+}
+
+# Format instructions never change, so they are substituted once at import;
+# only $articles and $stock_block vary per call.
+_PROMPT_TEMPLATE = (
+    _PROMPT_PATH.read_text(encoding='utf-8')
+    .replace('$format_instructions', _FORMAT_INSTRUCTIONS)
+)
+# Split around the per-call placeholders once; article text that happens to
+# contain '$stock_block' is then never substituted a second time.
+_PROMPT_HEAD, _PROMPT_REST = _PROMPT_TEMPLATE.split('$articles', 1)
+_PROMPT_MID, _PROMPT_TAIL = _PROMPT_REST.split('$stock_block', 1)
+
 
 def _normalize_digest(data):
     """Wrap bare list into {"sections": [...]} if the backend omitted the wrapper."""
@@ -90,13 +157,27 @@ def generate_summary(all_articles, stock_articles=None, stock_snapshot=''):
         stock_snapshot: pre-formatted compact index snapshot string
 
     Returns:
-        str: JSON string with "sections" key and optional "market_pulse"
+        dict: validated digest with "sections" and optional "market_pulse"
     """
     if not BACKEND:
         raise ValueError(f"Set BACKEND to {_SUPPORTED_BACKENDS}")
 
     prompt = _build_prompt(all_articles, stock_articles or [], stock_snapshot)
 
+    cache_path = _digest_cache_path(prompt) if LLM_CACHE else None
+    if cache_path:
+        cached = _load_cached_digest(cache_path)
+        if cached is not None:
+            print(f"♻️ Reusing cached digest for an identical prompt (LLM_CACHE=1): {cache_path.name}")
+            return cached
+
+    digest = _call_backend(prompt)
+    if cache_path:
+        _save_cached_digest(cache_path, digest)
+    return digest
+
+
+def _call_backend(prompt):
     if BACKEND == 'CLAUDE_API':
         if not ANTHROPIC_API_KEY:
             raise ValueError("Set ANTHROPIC_API_KEY for BACKEND=CLAUDE_API")
@@ -122,6 +203,32 @@ def generate_summary(all_articles, stock_articles=None, stock_snapshot=''):
     )
 
 
+def _digest_cache_path(prompt):
+    key = hashlib.sha256(f'{BACKEND}\0{MODEL or ""}\0{prompt}'.encode('utf-8')).hexdigest()[:32]
+    return _LLM_CACHE_DIR / f'{key}.json'
+
+
+def _load_cached_digest(path):
+    """Return the digest cached at path if younger than _LLM_CACHE_SECONDS, else None."""
+    try:
+        if time.time() - path.stat().st_mtime >= _LLM_CACHE_SECONDS:
+            return None
+        return json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+
+
+def _save_cached_digest(path, digest):
+    """Write via a temp file + rename so an interrupted run never leaves half a digest."""
+    tmp_path = path.with_suffix('.tmp')
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path.write_text(json.dumps(digest, ensure_ascii=False), encoding='utf-8')
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"⚠️ Failed to cache digest: {e}")
+
+
 def _model_for_backend(backend):
     if MODEL:
         return MODEL
@@ -136,11 +243,30 @@ def _model_for_backend(backend):
     raise ValueError(f"Unknown backend {backend!r}")
 
 
+def _retry_delay(attempt, err=None):
+    """
+    Seconds to wait before retry number attempt + 1.
+
+    Exponential backoff (1s, 2s, 4s, ...) plus up to 0.5s jitter, capped at
+    _RETRY_MAX_DELAY. An Anthropic 429 with a Retry-After header uses that
+    value instead.
+    """
+    # Anthropic raises RateLimitError for every 429; duck-typed so the SDK
+    # need not be imported on the other backends' retry paths.
+    if getattr(err, 'status_code', None) == 429:
+        try:
+            return min(float(err.response.headers.get('retry-after')), _RETRY_MAX_DELAY)
+        except (TypeError, ValueError):
+            pass
+    return min(2 ** (attempt - 1) + random.uniform(0, 0.5), _RETRY_MAX_DELAY)
+
+
 def _parse_digest_text(text, source_name):
     text = _strip_fences(text.strip())
     try:
         parsed = json.loads(text)
     except json.JSONDecodeError:
+        from json_repair import repair_json
         text = repair_json(text, ensure_ascii=False)
         parsed = json.loads(text)
         print("✅ JSON repaired")
@@ -150,20 +276,50 @@ def _parse_digest_text(text, source_name):
     except ValueError:
         print(f"⚠️ Raw {source_name} output (first 500 chars):\n{text[:500]}")
         raise
-    return json.dumps(parsed, ensure_ascii=False)
+    return parsed
+
+
+_anthropic_client = None
+
+
+def _get_anthropic_client():
+    """Process-wide Anthropic client so its HTTP connection pool survives across calls."""
+    global _anthropic_client
+    if _anthropic_client is None:
+        # Imported here so other backends skip the ~0.35s SDK import.
+        from anthropic import Anthropic
+        _anthropic_client = Anthropic(api_key=ANTHROPIC_API_KEY)
+    return _anthropic_client
+
+
+def _digest_from_tool_use(message):
+    """Validate the emit_digest tool input from a Claude API response and return it."""
+    if message.stop_reason == 'max_tokens':
+        raise ValueError("Claude API output hit max_tokens; digest is truncated")
+    for block in message.content:
+        if block.type == 'tool_use' and block.name == _DIGEST_TOOL['name']:
+            parsed = _normalize_digest(block.input)
+            _validate_digest_structure(parsed)
+            return parsed
+    raise ValueError("Claude API response has no emit_digest tool call")
 
 
 def _call_claude_api(prompt, model):
-    """Call Anthropic API with plain text output + json_repair fallback."""
-    client = Anthropic(api_key=ANTHROPIC_API_KEY)
+    """Call Anthropic API, forcing the emit_digest tool so output arrives as parsed JSON."""
+    from anthropic import APIStatusError
+
+    client = _get_anthropic_client()
+    # Built once; every retry sends the identical request.
+    request = {
+        'model': model,
+        'max_tokens': MAX_TOKENS,
+        'messages': [{"role": "user", "content": prompt}],
+        'tools': [_DIGEST_TOOL],
+        'tool_choice': {'type': 'tool', 'name': _DIGEST_TOOL['name']},
+    }
 
     def call():
-        message = client.messages.create(
-            model=model,
-            max_tokens=MAX_TOKENS,
-            messages=[{"role": "user", "content": prompt}],
-        )
-        return _parse_digest_text(message.content[0].text, 'Claude API')
+        return _digest_from_tool_use(client.messages.create(**request))
 
     last_err = None
     for attempt in range(1, MAX_RETRIES + 1):
@@ -178,27 +334,34 @@ def _call_claude_api(prompt, model):
             last_err = e
             print(f"⚠️ API attempt {attempt}/{MAX_RETRIES} failed — "
                   f"{type(e).__name__}: {e}")
+        if attempt < MAX_RETRIES:
+            time.sleep(_retry_delay(attempt, last_err))
     raise RuntimeError(f"Claude API failed after {MAX_RETRIES} attempts: {last_err}") from last_err
 
 
 def _call_bedrock_claude(prompt, model):
     """Call Claude through AWS Bedrock with plain text output + json_repair fallback."""
+    # Imported here so other backends skip the ~0.15s SDK import.
+    import boto3
+    from botocore.exceptions import ClientError
+
     client = boto3.client('bedrock-runtime', region_name=AWS_REGION)
+    # Serialized once; every retry sends the identical body.
+    request_body = json.dumps({
+        'anthropic_version': 'bedrock-2023-05-31',
+        'max_tokens': MAX_TOKENS,
+        'messages': [
+            {
+                'role': 'user',
+                'content': [{'type': 'text', 'text': prompt}],
+            },
+        ],
+    })
 
     def call():
-        request_body = {
-            'anthropic_version': 'bedrock-2023-05-31',
-            'max_tokens': MAX_TOKENS,
-            'messages': [
-                {
-                    'role': 'user',
-                    'content': [{'type': 'text', 'text': prompt}],
-                },
-            ],
-        }
         response = client.invoke_model(
             modelId=model,
-            body=json.dumps(request_body),
+            body=request_body,
             contentType='application/json',
             accept='application/json',
         )
@@ -225,6 +388,8 @@ def _call_bedrock_claude(prompt, model):
             last_err = e
             print(f"⚠️ Bedrock attempt {attempt}/{MAX_RETRIES} failed — "
                   f"{type(e).__name__}: {e}")
+        if attempt < MAX_RETRIES:
+            time.sleep(_retry_delay(attempt, last_err))
     raise RuntimeError(f"Bedrock Claude failed after {MAX_RETRIES} attempts: {last_err}") from last_err
 
 
@@ -253,6 +418,7 @@ def _call_claude_cli(prompt, model):
             last_err = e
             if attempt < MAX_RETRIES:
                 print(f"⚠️ Attempt {attempt} failed ({e}), retrying...")
+                time.sleep(_retry_delay(attempt))
     raise ValueError(f"Claude CLI failed after {MAX_RETRIES} attempts: {last_err}")
 
 
@@ -304,6 +470,7 @@ def _call_codex_cli(prompt, model):
             last_err = e
             if attempt < MAX_RETRIES:
                 print(f"⚠️ Attempt {attempt} failed ({e}), retrying...")
+                time.sleep(_retry_delay(attempt))
     raise ValueError(f"Codex CLI failed after {MAX_RETRIES} attempts: {last_err}")
 
 
@@ -316,25 +483,22 @@ def _wrap_codex_prompt(prompt):
 
 
 def _build_prompt(all_articles, stock_articles, stock_snapshot):
-    articles_by_category = []
+    parts = [_PROMPT_HEAD]
+    sep = ''
     for category, articles in all_articles.items():
         if not articles:
             continue
-        block = f"\n## {category}\n\n"
-        for i, article in enumerate(articles[:15], 1):
-            block += f"[{i}] {article['title']} | {article['source']}\n{article['summary']}\n\n"
-        articles_by_category.append(block)
-
-    full_content = "\n".join(articles_by_category)
-    stock_block = _format_stock_block(stock_articles, stock_snapshot)
-
-    template = _PROMPT_PATH.read_text(encoding='utf-8')
-    return (
-        template
-        .replace('$articles', full_content)
-        .replace('$stock_block', stock_block)
-        .replace('$format_instructions', _FORMAT_INSTRUCTIONS)
-    )
+        # Category blocks are separated by a blank line, as '\n'.join did.
+        parts.append(f"{sep}\n## {category}\n\n")
+        sep = '\n'
+        parts.extend(
+            f"[{i}] {article['title']} | {article['source']}\n{article['summary']}\n\n"
+            for i, article in enumerate(articles[:15], 1)
+        )
+    parts.append(_PROMPT_MID)
+    parts.append(_format_stock_block(stock_articles, stock_snapshot))
+    parts.append(_PROMPT_TAIL)
+    return ''.join(parts)
 
 
 def _format_stock_block(stock_articles, stock_snapshot):
@@ -358,8 +522,7 @@ def _format_stock_block(stock_articles, stock_snapshot):
 
 def _strip_fences(text):
     if text.startswith('```'):
-        text = re.sub(r'^```\w*\n?', '', text)
-        text = re.sub(r'\n?```$', '', text)
+        text = _FENCE_TAIL.sub('', _FENCE_HEAD.sub('', text))
     # Strip any preamble before the actual JSON payload.
     stripped = text.lstrip()
     if stripped.startswith(('{', '[')):
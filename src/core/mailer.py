@@ -2,7 +2,6 @@ import base64
 import imaplib
 import smtplib
 import time
-from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.utils import make_msgid
 
@@ -14,9 +13,9 @@ from core.config import (
 )
 
 
-def _get_access_token():
+def _get_access_token(session=requests):
     """Exchange refresh token for a short-lived access token via Google OAuth2."""
-    resp = requests.post('https://oauth2.googleapis.com/token', data={
+    resp = session.post('https://oauth2.googleapis.com/token', data={
         'client_id': GMAIL_CLIENT_ID,
         'client_secret': GMAIL_CLIENT_SECRET,
         'refresh_token': GMAIL_REFRESH_TOKEN,
@@ -26,28 +25,47 @@ def _get_access_token():
     return resp.json()['access_token']
 
 
+def _build_message(subject, body_html):
+    """
+    Single-part HTML message — there is no plain-text alternative to wrap.
+
+    The body is base64-encoded here, once; _address() then retargets the same
+    message at each recipient without re-encoding it.
+    """
+    msg = MIMEText(body_html, 'html', 'utf-8')
+    msg['Subject'] = subject
+    msg['From'] = GMAIL_USER
+    return msg
+
+
+def _address(msg, recipient):
+    """Set To and a fresh Message-ID for one recipient; returns the Message-ID."""
+    msg_id = make_msgid()
+    del msg['Message-ID']
+    del msg['To']
+    msg['Message-ID'] = msg_id
+    msg['To'] = recipient
+    return msg_id
+
+
 def _send_via_api(subject, body_html, recipients):
     """Send HTML email via Gmail REST API (HTTPS only, no SMTP)."""
-    access_token = _get_access_token()
     message_ids = []
+    msg = _build_message(subject, body_html)
 
-    for recipient in recipients:
-        msg = MIMEMultipart('alternative')
-        msg_id = make_msgid()
-        msg['Message-ID'] = msg_id
-        msg['Subject'] = subject
-        msg['From'] = GMAIL_USER
-        msg['To'] = recipient
-        msg.attach(MIMEText(body_html, 'html'))
-
-        raw = base64.urlsafe_b64encode(msg.as_bytes()).decode()
-        resp = requests.post(
-            'https://gmail.googleapis.com/gmail/v1/users/me/messages/send',
-            headers={'Authorization': f'Bearer {access_token}'},
-            json={'raw': raw},
-        )
-        resp.raise_for_status()
-        message_ids.append(resp.json().get('id'))
+    # One keep-alive session: each recipient reuses the TLS connection
+    # instead of handshaking again.
+    with requests.Session() as session:
+        session.headers['Authorization'] = f'Bearer {_get_access_token(session)}'
+        for recipient in recipients:
+            _address(msg, recipient)
+            raw = base64.urlsafe_b64encode(msg.as_bytes()).decode()
+            resp = session.post(
+                'https://gmail.googleapis.com/gmail/v1/users/me/messages/send',
+                json={'raw': raw},
+            )
+            resp.raise_for_status()
+            message_ids.append(resp.json().get('id'))
 
     return message_ids
 
@@ -55,17 +73,12 @@ def _send_via_api(subject, body_html, recipients):
 def _send_via_smtp(subject, body_html, recipients):
     """Send HTML email via Gmail SMTP (legacy fallback)."""
     message_ids = []
+    msg = _build_message(subject, body_html)
     with smtplib.SMTP_SSL('smtp.gmail.com', 465) as server:
         server.login(GMAIL_USER, GMAIL_APP_PASSWORD)
         for recipient in recipients:
-            msg = MIMEMultipart('alternative')
-            msg_id = make_msgid()
-            msg['Message-ID'] = msg_id
-            msg['Subject'] = subject
-            msg['From'] = GMAIL_USER
-            msg['To'] = recipient
-            msg.attach(MIMEText(body_html, 'html'))
-            server.sendmail(GMAIL_USER, [recipient], msg.as_string())
+            msg_id = _address(msg, recipient)
+            server.send_message(msg, from_addr=GMAIL_USER, to_addrs=[recipient])
             message_ids.append(msg_id)
     return message_ids
 
@@ -2,7 +2,11 @@ import html
 from datetime import datetime
 from pathlib import Path
 
+_DATE_FORMAT = '%Y年%m月%d日'
 _TEMPLATE = (Path(__file__).parent.parent / 'templates' / 'email.html').read_text(encoding='utf-8')
+# Split around the two placeholders once so each render is a single join.
+_HEAD, _REST = _TEMPLATE.split('$date_str', 1)
+_MID, _TAIL = _REST.split('$body_html', 1)
 
 _H2_STYLE = 'color:#2c3e50;border-bottom:2px solid #3498db;padding-bottom:10px;margin-top:30px;'
 _H3_STYLE = 'color:#34495e;margin-top:32px;margin-bottom:8px;padding-top:24px;border-top:1px solid #eee;'
@@ -43,6 +47,18 @@ _MKT_RELATED_STYLE = (
 )
 
 
+def _esc(text):
+    """
+    html.escape, skipping the five replace passes when there is nothing to escape.
+
+    Most fields (Chinese titles and summaries, feed URLs) contain none of these
+    characters, and five `in` checks are much cheaper than five replaces.
+    """
+    if '&' in text or '<' in text or '>' in text or '"' in text or "'" in text:
+        return html.escape(text)
+    return text
+
+
 def build_email_html_from_json(sections, gas_prices=None, stock_indices=None, market_pulse=None):
     """
     Render resolved section data into a complete HTML email document.
@@ -57,18 +73,19 @@ def build_email_html_from_json(sections, gas_prices=None, stock_indices=None, ma
     Returns:
         str: Full HTML document string
     """
-    date_str = datetime.now().strftime('%Y年%m月%d日')
-    body_html = ''
+    parts = [_HEAD, today_str(), _MID]
     if stock_indices or market_pulse:
-        body_html += _render_market_pulse_section(stock_indices or [], market_pulse)
-    body_html += _render_body(sections)
+        parts.append(_render_market_pulse_section(stock_indices or [], market_pulse))
+    parts.append(_render_body(sections))
     if gas_prices:
-        body_html += _render_gas_section(gas_prices)
-    return (
-        _TEMPLATE
-        .replace('$date_str', date_str)
-        .replace('$body_html', body_html)
-    )
+        parts.append(_render_gas_section(gas_prices))
+    parts.append(_TAIL)
+    return ''.join(parts)
+
+
+def today_str():
+    """Today's date as shown in the email header and subject, e.g. 2025年01月01日."""
+    return datetime.now().strftime(_DATE_FORMAT)
 
 
 def _render_market_pulse_section(indices, pulse):
@@ -84,17 +101,17 @@ def _render_market_pulse_section(indices, pulse):
 def _render_indices_card(indices):
     rows = []
     for idx in indices:
-        change = html.escape(idx.get('change_display', ''))
+        change = _esc(idx.get('change_display', ''))
         if idx['direction'] == 'up':
             change_html = f'<span style="{_MKT_UP}">▲ {change}</span>'
         elif idx['direction'] == 'down':
             change_html = f'<span style="{_MKT_DOWN}">▼ {change}</span>'
         else:
-            change_html = html.escape(change)
+            change_html = change
         rows.append(
             f'<tr>'
-            f'<td style="{_GAS_TD_STYLE}">{html.escape(idx["name"])}</td>'
-            f'<td style="{_GAS_TD_STYLE}font-weight:bold;">{html.escape(str(idx["price"]))}</td>'
+            f'<td style="{_GAS_TD_STYLE}">{_esc(idx["name"])}</td>'
+            f'<td style="{_GAS_TD_STYLE}font-weight:bold;">{_esc(str(idx["price"]))}</td>'
             f'<td style="{_GAS_TD_STYLE}">{change_html}</td>'
             f'</tr>'
         )
@@ -118,15 +135,15 @@ def _render_pulse_narrative(pulse):
 
     summary = pulse.get('summary', '').strip()
     if summary:
-        parts.append(f'<div style="{_MKT_SUMMARY_STYLE}">{html.escape(summary)}</div>')
+        parts.append(f'<div style="{_MKT_SUMMARY_STYLE}">{_esc(summary)}</div>')
 
     drivers = pulse.get('drivers', [])
     if drivers:
         parts.append(f'<p style="{_MKT_SUBHEAD_STYLE}">🔑 关键驱动</p>')
         items = []
         for d in drivers:
-            title = html.escape(d.get('title', '').strip())
-            detail = html.escape(d.get('detail', '').strip())
+            title = _esc(d.get('title', '').strip())
+            detail = _esc(d.get('detail', '').strip())
             items.append(
                 f'<li><span style="{_MKT_DRIVER_TITLE_STYLE}">{title}</span>'
                 + (f'：{detail}' if detail else '') + '</li>'
@@ -136,7 +153,7 @@ def _render_pulse_narrative(pulse):
     watch = pulse.get('watch', [])
     if watch:
         parts.append(f'<p style="{_MKT_SUBHEAD_STYLE}">🗓️ 本周/近期关注</p>')
-        items = [f'<li>{html.escape(str(w))}</li>' for w in watch]
+        items = [f'<li>{_esc(str(w))}</li>' for w in watch]
         parts.append(f'<ul style="{_MKT_LIST_STYLE}">' + '\n'.join(items) + '</ul>')
 
     related = pulse.get('related', [])
@@ -150,12 +167,12 @@ def _render_pulse_narrative(pulse):
             source_text = _clean_source_label((r.get('source') or '').strip())
             label = title_text or source_text or 'Source'
             source_html = (
-                f' <span style="color:#adb5bd;font-size:0.9em;">— {html.escape(source_text)}</span>'
+                f' <span style="color:#adb5bd;font-size:0.9em;">— {_esc(source_text)}</span>'
                 if source_text and title_text and source_text not in title_text else ''
             )
             items.append(
                 f'<li style="margin:4px 0;line-height:1.5;">'
-                f'<a style="{_A_STYLE}" href="{html.escape(href)}">{html.escape(label)}</a>'
+                f'<a style="{_A_STYLE}" href="{_esc(href)}">{_esc(label)}</a>'
                 f'{source_html}</li>'
             )
         if items:
@@ -188,36 +205,36 @@ def _render_gas_section(gas_prices_list):
 
 def _render_gas_city(gp):
     """Render gas prices for a single city as a compact info box."""
-    unit = html.escape(gp.get('unit', ''))
+    unit = _esc(gp.get('unit', ''))
     rows = []
     for fuel in gp['fuels']:
         change_html = ''
         if fuel.get('direction') and fuel.get('change'):
             if fuel['direction'] == 'up':
-                change_html = f'<span style="{_GAS_CHANGE_UP}">▲ {html.escape(fuel["change"])}</span>'
+                change_html = f'<span style="{_GAS_CHANGE_UP}">▲ {_esc(fuel["change"])}</span>'
             elif fuel['direction'] == 'down':
-                change_html = f'<span style="{_GAS_CHANGE_DOWN}">▼ {html.escape(fuel["change"])}</span>'
+                change_html = f'<span style="{_GAS_CHANGE_DOWN}">▼ {_esc(fuel["change"])}</span>'
             else:
-                change_html = f'{html.escape(fuel["change"])}'
+                change_html = f'{_esc(fuel["change"])}'
         rows.append(
             f'<tr>'
-            f'<td style="{_GAS_TD_STYLE}">{html.escape(fuel["type"])}</td>'
-            f'<td style="{_GAS_TD_STYLE}font-weight:bold;">{html.escape(fuel["price"])}</td>'
+            f'<td style="{_GAS_TD_STYLE}">{_esc(fuel["type"])}</td>'
+            f'<td style="{_GAS_TD_STYLE}font-weight:bold;">{_esc(fuel["price"])}</td>'
             f'<td style="{_GAS_TD_STYLE}">{change_html}</td>'
             f'</tr>'
         )
 
     avg = ''
     if gp.get('average_price'):
-        avg = f'<p style="margin:10px 0 0;color:#6c757d;font-size:0.85em;">当前均价: {html.escape(gp["average_price"])}/L</p>'
+        avg = f'<p style="margin:10px 0 0;color:#6c757d;font-size:0.85em;">当前均价: {_esc(gp["average_price"])}/L</p>'
 
-    source_url = html.escape(gp['source_url'])
-    source_name = html.escape(gp.get('source_name', 'Source'))
+    source_url = _esc(gp['source_url'])
+    source_name = _esc(gp.get('source_name', 'Source'))
 
     return (
         f'<div style="{_GAS_BOX_STYLE}">'
         f'<p style="{_GAS_TITLE_STYLE}">'
-        f'📍 {html.escape(gp["city"])}'
+        f'📍 {_esc(gp["city"])}'
         f' - {"Tomorrow\'s Prediction" if gp.get("is_prediction") else "Current"}'
         f'<span style="font-weight:normal;color:#6c757d;font-size:0.85em;"> ({unit})</span></p>'
         f'<table style="{_GAS_TABLE_STYLE}">'
@@ -233,29 +250,41 @@ def _render_gas_city(gp):
     )
 
 
+# Per-article markup with the style constants baked in once at import;
+# _render_body only fills in the escaped fields.
+_SECTION_HEAD_TMPL = f'<h2 style="{_H2_STYLE}">{{emoji}} {{category}}</h2>\n'
+_ARTICLE_HEAD_TMPL = f'<h3 style="{_H3_STYLE}">{{index}}. {{title_zh}}</h3>\n'
+_ARTICLE_IMG_TMPL = f'<img onerror="this.remove()" style="{_ARTICLE_IMG_STYLE}" src="{{src}}" />\n'
+_ARTICLE_TAIL_TMPL = (
+    f'<p style="{_P_STYLE}">{{summary_zh}}</p>\n'
+    f'<p style="{_P_STYLE}">🔗 原文: <a style="{_A_STYLE}" href="{{link}}">'
+    f'{{title}}</a><br/>'
+    f'📰 来源: {{source}} | {{published}}</p>\n'
+    f'<hr style="{_HR_STYLE}"/>\n'
+)
+
+
 def _render_body(sections):
     parts = []
+    append = parts.append
     for section in sections:
-        category = section['category']
-        emoji = section.get('emoji', '')
-
-        parts.append(f'<h2 style="{_H2_STYLE}">{emoji} {html.escape(category)}</h2>')
-
+        append(_SECTION_HEAD_TMPL.format(
+            emoji=section.get('emoji', ''), category=_esc(section['category']),
+        ))
         for i, item in enumerate(section['items'], 1):
-            parts.append(f'<h3 style="{_H3_STYLE}">{i}. {html.escape(item["title_zh"])}</h3>')
-
-            if item.get('image_url'):
-                parts.append(
-                    f'<img onerror="this.remove()" style="{_ARTICLE_IMG_STYLE}"'
-                    f' src="{html.escape(item["image_url"])}" />'
-                )
-
-            parts.append(f'<p style="{_P_STYLE}">{html.escape(item["summary_zh"])}</p>')
-            parts.append(
-                f'<p style="{_P_STYLE}">🔗 原文: <a style="{_A_STYLE}" href="{html.escape(item["link"])}">'
-                f'{html.escape(item["title"])}</a><br/>'
-                f'📰 来源: {html.escape(item["source"])} | {html.escape(item["published"])}</p>'
-            )
-            parts.append(f'<hr style="{_HR_STYLE}"/>')
-
-    return '\n'.join(parts)
+            _render_article(i, item, append)
+
+    return ''.join(parts)
+
+
+def _render_article(i, item, append):
+    append(_ARTICLE_HEAD_TMPL.format(index=i, title_zh=_esc(item['title_zh'])))
+    if item.get('image_url'):
+        append(_ARTICLE_IMG_TMPL.format(src=_esc(item['image_url'])))
+    append(_ARTICLE_TAIL_TMPL.format(
+        summary_zh=_esc(item['summary_zh']),
+        link=_esc(item['link']),
+        title=_esc(item['title']),
+        source=_esc(item['source']),
+        published=_esc(item['published']),
+    ))
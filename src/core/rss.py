@@ -1,9 +1,37 @@
 import html
 import re
-import socket
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from operator import itemgetter
+from urllib.parse import urljoin, urlparse
 
-import feedparser
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from core.feed_cache import is_fresh, load_cached_feed, save_cached_feed, touch_cached_feed
+from core.feed_parser import parse_feed
+
+
+_IMG_SRC_RE = re.compile(r'<img[^>]+src=["\']([^"\']+)["\']')
+_BLOCKED_IMAGE_EXTS = frozenset(('ico', 'svg', 'mp4', 'webm', 'ogg'))
+
+
+def _is_valid_image_url(url):
+    """Reject favicons, tiny icons, and non-image files."""
+    if not url:
+        return False
+    lower = url.lower()
+    if 'favicon' in lower:
+        return False
+    # Check the path's extension so query strings (icon.svg?v=2) can't hide it.
+    if urlparse(lower).path.rpartition('.')[2] in _BLOCKED_IMAGE_EXTS:
+        return False
+    # Google News RSS only has the site favicon, not article images
+    if url.startswith('https://news.google.com/'):
+        return False
+    return True
 
 
 def extract_image_url(entry):
@@ -11,59 +39,57 @@ def extract_image_url(entry):
     Extract a thumbnail image URL from a feedparser entry.
     Tries fields in priority order; returns None if nothing found.
     """
-    def is_valid_image_url(url):
-        """Reject favicons, tiny icons, and non-image files."""
-        if not url:
-            return False
-        lower = url.lower()
-        if 'favicon' in lower:
-            return False
-        if lower.endswith(('.ico', '.svg', '.mp4', '.webm', '.ogg')):
-            return False
-        # Google News RSS only has the site favicon, not article images
-        if url.startswith('https://news.google.com/'):
-            return False
-        return True
-
     # 1. media:content (Guardian, Ars Technica) — last item tends to be largest
     media = getattr(entry, 'media_content', None)
     if media:
         url = media[-1].get('url', '')
-        if is_valid_image_url(url):
+        if _is_valid_image_url(url):
             return url
 
     # 2. media:thumbnail (BBC, Ars Technica) — fallback, lower resolution
     thumbnails = getattr(entry, 'media_thumbnail', None)
     if thumbnails:
         url = thumbnails[0].get('url')
-        if is_valid_image_url(url):
+        if _is_valid_image_url(url):
             return url
 
     # 3. <img> in Atom content (The Verge)
     content = getattr(entry, 'content', None)
     if content:
-        match = re.search(r'<img[^>]+src=["\']([^"\']+)["\']', content[0].get('value', ''))
-        if match and is_valid_image_url(match.group(1)):
-            return match.group(1)
+        url = _img_src(entry, content[0].get('value', ''))
+        if _is_valid_image_url(url):
+            return url
 
     # 4. <img> in summary HTML
     summary = entry.get('summary', '')
     if summary:
-        match = re.search(r'<img[^>]+src=["\']([^"\']+)["\']', summary)
-        if match and is_valid_image_url(match.group(1)):
-            return match.group(1)
+        url = _img_src(entry, summary)
+        if _is_valid_image_url(url):
+            return url
 
     return None
 
 
+def _img_src(entry, markup):
+    """First <img src> in markup, made absolute against the entry link (feed HTML isn't URI-resolved)."""
+    match = _IMG_SRC_RE.search(markup)
+    if not match:
+        return None
+    return urljoin(entry.get('link', ''), match.group(1))
+
+
+# Only strip real tag shapes; preserves text like "value < 5 and > 3".
+_TAG_RE = re.compile(r'<[a-zA-Z/!][^>]*>')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
 def _clean_summary(raw, max_chars=220):
     """Strip HTML tags + unescape entities, then truncate. Keeps summary token-frugal."""
     if not raw:
         return ''
     text = html.unescape(raw)
-    # Only strip real tag shapes; preserves text like "value < 5 and > 3".
-    text = re.sub(r'<[a-zA-Z/!][^>]*>', ' ', text)
-    text = re.sub(r'\s+', ' ', text).strip()
+    text = _TAG_RE.sub(' ', text)
+    text = _WHITESPACE_RE.sub(' ', text).strip()
     return text[:max_chars]
 
 
@@ -73,21 +99,260 @@ _SOURCE_NAME_OVERRIDES = {
     'rss.nytimes.com': 'New York Times',
     'feeds.bbci.co.uk': 'BBC News',
 }
+_ALLINURL_RE = re.compile(r'allinurl:([a-zA-Z0-9.-]+\.[a-z]{2,})')
 
 
+@lru_cache(maxsize=128)
 def _resolve_source_name(feed_url, feed_title):
     """Return a clean source name, handling Google News search and known overrides."""
-    from urllib.parse import urlparse
     domain = urlparse(feed_url).hostname or ''
     if domain in _SOURCE_NAME_OVERRIDES:
         return _SOURCE_NAME_OVERRIDES[domain]
     if domain == 'news.google.com' and '/search' in feed_url:
-        match = re.search(r'allinurl:([a-zA-Z0-9.-]+\.[a-z]{2,})', feed_url)
+        match = _ALLINURL_RE.search(feed_url)
         if match:
             return match.group(1).split('.')[0].capitalize()
     return feed_title
 
 
+_USER_AGENT = (
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) '
+    'AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+)
+# Feed downloads are network-bound; threads overlap the latency of slow hosts.
+_FETCH_WORKERS = 8
+_FETCH_TIMEOUT = 15
+_PUBLISHED_FORMAT = '%Y-%m-%d %H:%M'
+
+
+# Retry transient server errors, but keep a dead feed bounded: one reconnect,
+# no re-read after a read timeout, and backoff instead of the server's
+# Retry-After (which urllib3 would otherwise sleep for uncapped).
+_RETRY = Retry(
+    total=2,
+    connect=1,
+    read=0,
+    backoff_factor=0.5,
+    status_forcelist=(429, 500, 502, 503, 504),
+    respect_retry_after_header=False,
+)
+
+
+def _build_session():
+    """Shared keep-alive session: hosts serving several feeds reuse TLS connections."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=_FETCH_WORKERS,
+        max_retries=_RETRY,
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers['User-Agent'] = _USER_AGENT
+    return session
+
+
+_SESSION = _build_session()
+
+
+def _download_feed(feed_url, revalidate=False):
+    """
+    Download raw feed bytes. Parsing happens separately on the caller's thread.
+
+    A cached copy younger than feed_cache.FRESH_SECONDS is returned without a
+    request unless revalidate is set. Otherwise the cached copy is revalidated
+    with If-None-Match / If-Modified-Since; a 304 reuses the cached body
+    without transferring it.
+
+    Args:
+        feed_url: Feed URL to download
+        revalidate: Always ask the server, even when the cached copy is fresh
+
+    Returns:
+        (body, headers): body bytes + the lowercase response headers feedparser
+        uses for charset detection and relative-link resolution.
+    """
+    cached = load_cached_feed(feed_url)
+    if cached and not revalidate and is_fresh(cached):
+        return cached['body'], cached['headers']
+    request_headers = {}
+    if cached:
+        if cached.get('etag'):
+            request_headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            request_headers['If-Modified-Since'] = cached['last_modified']
+
+    resp = _SESSION.get(feed_url, headers=request_headers, timeout=_FETCH_TIMEOUT)
+    if resp.status_code == 304 and cached:
+        touch_cached_feed(feed_url, cached)
+        return cached['body'], cached['headers']
+    resp.raise_for_status()
+
+    headers = {'content-location': resp.url}
+    if 'Content-Type' in resp.headers:
+        headers['content-type'] = resp.headers['Content-Type']
+    save_cached_feed(
+        feed_url, resp.content, headers,
+        etag=resp.headers.get('ETag'),
+        last_modified=resp.headers.get('Last-Modified'),
+    )
+    return resp.content, headers
+
+
+def _articles_from_feed(feed, feed_url, category, cutoff_tuple, max_per_feed):
+    """
+    Turn a parsed feed into article dicts published at or after the cutoff.
+
+    cutoff_tuple is a UTC (Y, m, d, H, M, S) tuple. feedparser's *_parsed
+    fields are UTC struct_times, so their first six fields compare against it
+    directly and a datetime is only built for entries that pass.
+    """
+    source_name = _resolve_source_name(feed_url, feed.feed.get('title', 'Unknown'))
+    articles = []
+    for entry in feed.entries:
+        if len(articles) >= max_per_feed:
+            break
+        # dict.get skips FeedParserDict's failed-attribute → __getattr__ detour
+        # and its deprecated updated_parsed → published_parsed alias.
+        parsed = dict.get(entry, 'published_parsed') or dict.get(entry, 'updated_parsed')
+        if not parsed:
+            continue
+        # Slicing a struct_time already yields a plain tuple.
+        ymdhms = parsed[:6]
+        if ymdhms < cutoff_tuple:
+            continue
+
+        pub_date = datetime(*ymdhms, tzinfo=timezone.utc)
+        articles.append({
+            'title': html.unescape(entry.title),
+            'link': entry.link,
+            'pub_date': pub_date,
+            'published': pub_date.strftime(_PUBLISHED_FORMAT),
+            'summary': _clean_summary(entry.get('summary', '')),
+            'source': source_name,
+            'category': category,
+            'image_url': extract_image_url(entry),
+        })
+    return articles
+
+
+def _parse_single_feed(body, headers, feed_url, category, cutoff_tuple, max_per_feed):
+    feed = parse_feed(body, headers)
+    if feed.bozo and not feed.entries:
+        print(f"⚠️ Skipping unparseable feed {feed_url}: {feed.bozo_exception}")
+        return []
+    return _articles_from_feed(feed, feed_url, category, cutoff_tuple, max_per_feed)
+
+
+def fetch_all_rss_articles(sources, hours=24, max_per_feed=4):
+    """
+    Fetch recent articles for several categories.
+
+    All feeds are downloaded concurrently; each body is parsed on this thread
+    as its download completes, so at most one parse runs at a time and
+    parsing starts in completion order.
+
+    Args:
+        sources: dict mapping category name → list of RSS feed URLs
+        hours: How many hours back to fetch (default 24)
+        max_per_feed: Max articles to take from each feed
+
+    Returns:
+        dict: category → list of article dicts sorted newest first
+    """
+    cutoff_tuple = (datetime.now(timezone.utc) - timedelta(hours=hours)).utctimetuple()[:6]
+    feed_pairs = [(category, url) for category, feeds in sources.items() for url in feeds]
+    per_feed = [[] for _ in feed_pairs]
+    # A URL listed under several categories is downloaded once and fanned out.
+    slots_by_url = {}
+    for i, (_, feed_url) in enumerate(feed_pairs):
+        slots_by_url.setdefault(feed_url, []).append(i)
+
+    with ThreadPoolExecutor(max_workers=_FETCH_WORKERS) as executor:
+        futures = {
+            executor.submit(_download_feed, feed_url): feed_url
+            for feed_url in slots_by_url
+        }
+        # Parse in completion order so one slow host doesn't hold up the rest;
+        # results land in per-feed slots to keep the output order deterministic.
+        for future in as_completed(futures):
+            feed_url = futures[future]
+            try:
+                body, headers = future.result()
+                for i in slots_by_url[feed_url]:
+                    per_feed[i] = _parse_single_feed(
+                        body, headers, feed_url, feed_pairs[i][0], cutoff_tuple, max_per_feed,
+                    )
+            except Exception as e:
+                print(f"⚠️ Failed to fetch {feed_url}: {e}")
+
+    results = {category: [] for category in sources}
+    for (category, _), articles in zip(feed_pairs, per_feed):
+        results[category].extend(articles)
+    for articles in results.values():
+        articles.sort(key=itemgetter('pub_date'), reverse=True)
+    return results
+
+
+_WORD_RE = re.compile(r'\w+')
+# Query parameters that only track the referral, never select the article.
+_TRACKING_PARAM_PREFIXES = ('utm_', 'at_')
+_TRACKING_PARAMS = frozenset(('fbclid', 'gclid', 'mc_cid', 'mc_eid', 'cmpid', 'ocid', 'smid'))
+
+
+def _title_key(title):
+    """Lowercased words only, so punctuation/case variants of a headline collide."""
+    return ' '.join(_WORD_RE.findall(title.lower()))
+
+
+def _link_key(link):
+    """Link without its fragment, tracking parameters or trailing slash."""
+    link = link.split('#', 1)[0]
+    base, _, query = link.partition('?')
+    kept = [
+        param for param in query.split('&')
+        if param and not _is_tracking_param(param.split('=', 1)[0].lower())
+    ]
+    base = base.rstrip('/')
+    return f"{base}?{'&'.join(kept)}" if kept else base
+
+
+def _is_tracking_param(name):
+    return name.startswith(_TRACKING_PARAM_PREFIXES) or name in _TRACKING_PARAMS
+
+
+def dedupe_articles(articles_by_category):
+    """
+    Drop repeat stories across all categories, keeping the first occurrence.
+
+    Two articles are the same story if their links match ignoring the fragment
+    and tracking parameters (utm_*, fbclid, ...), or their normalized titles
+    match (syndicated copies).
+
+    Args:
+        articles_by_category: dict category → list of article dicts
+
+    Returns:
+        dict: same shape, duplicates removed, order preserved
+    """
+    seen_links = set()
+    seen_titles = set()
+    deduped = {}
+    for category, articles in articles_by_category.items():
+        kept = []
+        for article in articles:
+            link_key = _link_key(article['link'])
+            title_key = _title_key(article['title'])
+            if link_key in seen_links or (title_key and title_key in seen_titles):
+                continue
+            seen_links.add(link_key)
+            if title_key:
+                seen_titles.add(title_key)
+            kept.append(article)
+        deduped[category] = kept
+    return deduped
+
+
 def fetch_rss_articles(category, feeds, hours=24, max_per_feed=4):
     """
     Fetch recent articles from the given RSS feeds.
@@ -101,46 +366,4 @@ def fetch_rss_articles(category, feeds, hours=24, max_per_feed=4):
     Returns:
         list: List of article dicts sorted newest first
     """
-    cutoff_time = datetime.now(timezone.utc) - timedelta(hours=hours)
-    articles = []
-
-    for feed_url in feeds:
-        try:
-            socket.setdefaulttimeout(15)
-            feed = feedparser.parse(
-                feed_url,
-                agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) '
-                      'AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            )
-            socket.setdefaulttimeout(None)
-
-            source_name = _resolve_source_name(feed_url, feed.feed.get('title', 'Unknown'))
-            feed_article_count = 0
-            for entry in feed.entries:
-                if feed_article_count >= max_per_feed:
-                    break
-                if hasattr(entry, 'published_parsed'):
-                    pub_date = datetime(*entry.published_parsed[:6], tzinfo=timezone.utc)
-                elif hasattr(entry, 'updated_parsed'):
-                    pub_date = datetime(*entry.updated_parsed[:6], tzinfo=timezone.utc)
-                else:
-                    continue
-
-                if pub_date >= cutoff_time:
-                    feed_article_count += 1
-                    articles.append({
-                        'title': html.unescape(entry.title),
-                        'link': entry.link,
-                        'pub_date': pub_date,
-                        'published': pub_date.strftime('%Y-%m-%d %H:%M'),
-                        'summary': _clean_summary(entry.get('summary', '')),
-                        'source': source_name,
-                        'category': category,
-                        'image_url': extract_image_url(entry),
-                    })
-        except Exception as e:
-            print(f"⚠️ Failed to fetch {feed_url}: {e}")
-            continue
-
-    articles.sort(key=lambda x: x['pub_date'], reverse=True)
-    return articles
+    return fetch_all_rss_articles({category: feeds}, hours, max_per_feed)[category]
@@ -7,21 +7,21 @@ Runs on GitHub Actions daily at 08:00 PST (UTC 16:00).
 import json
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
 
-from datetime import datetime
-
 from core.config import RSS_SOURCES, STOCK_RSS_FEEDS, EMAIL_TO
-from core.rss import fetch_rss_articles
+from core.rss import dedupe_articles, fetch_all_rss_articles
 from core.llm_client import generate_summary
 from core.digest import resolve_references, resolve_market_pulse
-from core.renderer import build_email_html_from_json
+from core.renderer import build_email_html_from_json, today_str
 from core.mailer import send_email_gmail, delete_sent_emails
 from core.gas_prices import fetch_all_gas_prices
 from core.stock_market import fetch_stock_indices, format_snapshot_for_prompt
 
 OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'generated')
 SIMPLE_MODE = os.environ.get('MODE', '').upper() == 'TEST'
+_STOCK_CATEGORY = 'Stock Market'
 
 
 def generate_digest():
@@ -38,19 +38,20 @@ def generate_digest():
     print("=" * 60)
     print()
 
-    # 1. Fetch narrative-category RSS articles
+    # 1. Fetch narrative-category + stock-market RSS articles
+    # Stock-market feeds ride along in the same parallel batch but are kept
+    # separate afterwards — they feed market_pulse only.
     print("📥 Fetching RSS articles...")
-    all_articles = {}
-    for category, feeds in RSS_SOURCES.items():
-        print(f"  - {category}...")
-        articles = fetch_rss_articles(category, feeds)
-        all_articles[category] = articles
-        print(f"    {len(articles)} recent articles")
-
-    # 1b. Fetch stock-market RSS (separate — feeds market_pulse only)
-    print("  - Stock Market (market_pulse input)...")
-    stock_articles = fetch_rss_articles('Stock Market', STOCK_RSS_FEEDS)
-    print(f"    {len(stock_articles)} recent articles")
+    all_articles = fetch_all_rss_articles({**RSS_SOURCES, _STOCK_CATEGORY: STOCK_RSS_FEEDS})
+    stock_articles = all_articles.pop(_STOCK_CATEGORY)
+    fetched = sum(len(a) for a in all_articles.values())
+    all_articles = dedupe_articles(all_articles)
+    duplicates = fetched - sum(len(a) for a in all_articles.values())
+    if duplicates:
+        print(f"  🔁 Dropped {duplicates} duplicate articles across categories")
+    for category, articles in all_articles.items():
+        print(f"  - {category}: {len(articles)} recent articles")
+    print(f"  - Stock Market (market_pulse input): {len(stock_articles)} recent articles")
 
     if SIMPLE_MODE:
         all_articles = {k: v[:1] for k, v in all_articles.items()}
@@ -63,17 +64,21 @@ def generate_digest():
         print("⚠️ No articles found, exiting")
         return None, None
 
-    # 2. Fetch gas prices
-    print("⛽ Fetching gas prices...")
-    gas_prices = fetch_all_gas_prices()
+    # 2-3. Fetch gas prices + stock index snapshot
+    # The two are independent, so their requests run side by side; any
+    # warnings they print stay in this section.
+    print("⛽ Fetching gas prices and 📈 stock indices...")
+    with ThreadPoolExecutor(max_workers=2) as side_fetches:
+        gas_future = side_fetches.submit(fetch_all_gas_prices)
+        stock_future = side_fetches.submit(fetch_stock_indices)
+    gas_prices = gas_future.result()
+    stock_indices = stock_future.result()
+
     for gp in gas_prices:
         print(f"  {gp['city']}: {gp['fuels'][0]['price']} {gp['unit']}")
     if not gas_prices:
         print("  ⚠️ Gas prices unavailable, skipping")
 
-    # 3. Fetch stock index snapshot
-    print("📈 Fetching stock indices...")
-    stock_indices = fetch_stock_indices()
     for i in stock_indices:
         print(f"  {i['name']}: {i['price']} ({i['change_display']})")
     if not stock_indices:
@@ -81,12 +86,11 @@ def generate_digest():
 
     # 4. Generate digest via configured LLM backend (JSON output with sections + market_pulse)
     stock_snapshot = format_snapshot_for_prompt(stock_indices)
-    json_str = generate_summary(
+    parsed = generate_summary(
         all_articles,
         stock_articles=stock_articles,
         stock_snapshot=stock_snapshot,
     )
-    parsed = json.loads(json_str)
     sections = resolve_references(parsed, all_articles)
     market_pulse = resolve_market_pulse(parsed, stock_articles)
 
@@ -117,14 +121,16 @@ def save_preview(email_html, parsed_json):
     """Save preview files to generated/ directory."""
     os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+    # Encode once and write bytes: json.dump would issue one small write per
+    # token, and text mode would depend on the locale's default encoding.
     json_path = os.path.join(OUTPUT_DIR, "preview.json")
-    with open(json_path, "w") as f:
-        json.dump(parsed_json, f, ensure_ascii=False, indent=2)
+    with open(json_path, "wb") as f:
+        f.write(json.dumps(parsed_json, ensure_ascii=False, indent=2).encode("utf-8"))
     print(f"\n📄 JSON saved → {json_path}")
 
     preview_path = os.path.join(OUTPUT_DIR, "preview.html")
-    with open(preview_path, "w") as f:
-        f.write(email_html)
+    with open(preview_path, "wb") as f:
+        f.write(email_html.encode("utf-8"))
     print(f"📄 Preview saved → {preview_path}")
 
 
@@ -132,7 +138,7 @@ def send_email(email_html):
     """Send digest email via Gmail."""
     if EMAIL_TO:
         recipients = [addr.strip() for addr in EMAIL_TO.split(',')]
-        subject = f"📰 每日新闻摘要 - {datetime.now().strftime('%Y年%m月%d日')}"
+        subject = f"📰 每日新闻摘要 - {today_str()}"
         msg_ids = send_email_gmail(subject, email_html, recipients)
         delete_sent_emails(msg_ids)
     else:
@@ -24,8 +24,8 @@ if __name__ == '__main__':
         print(f"❌ {PREVIEW_PATH} not found — run tests/test_llm.py first")
         sys.exit(1)
 
-    with open(PREVIEW_PATH, 'r') as f:
-        html = f.read()
+    with open(PREVIEW_PATH, 'rb') as f:
+        html = f.read().decode('utf-8')
 
     from datetime import datetime
 
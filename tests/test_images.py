@@ -63,8 +63,8 @@ MOCK_SECTIONS = [
 
 html = build_email_html_from_json(MOCK_SECTIONS)
 output_path = os.path.join(OUTPUT_DIR, 'preview_images.html')
-with open(output_path, 'w') as f:
-    f.write(html)
+with open(output_path, 'wb') as f:
+    f.write(html.encode('utf-8'))
 
 print(f"✅ Saved to {output_path}")
 print("   Open in browser to verify image rendering.")
@@ -6,61 +6,60 @@ Checks reachability and reports article counts.
 
 import sys
 import os
-import socket
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-import feedparser
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, timezone
 from core.config import RSS_SOURCES
+from core.feed_parser import parse_feed
+from core.rss import _download_feed
 
 HOURS = 24
+FETCH_WORKERS = 8
 cutoff_time = datetime.now(timezone.utc) - timedelta(hours=HOURS)
+# *_parsed fields are UTC struct_times: compare their first six fields directly.
+cutoff_tuple = cutoff_time.utctimetuple()[:6]
 
 
-def test_feed(url):
+def summarize_feed(body, headers):
     """
-    Fetch a single feed and return a result dict.
+    Parse a downloaded feed and return a result dict.
     """
-    try:
-        socket.setdefaulttimeout(15)
-        feed = feedparser.parse(url, agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
-        socket.setdefaulttimeout(None)
-
-        if feed.bozo and not feed.entries:
-            return {"ok": False, "error": str(feed.bozo_exception)}
-
-        recent = 0
-        articles = []
-        for entry in feed.entries:
-            parsed = getattr(entry, "published_parsed", None) or getattr(entry, "updated_parsed", None)
-            if parsed:
-                pub_date = datetime(*parsed[:6], tzinfo=timezone.utc)
-                is_recent = pub_date >= cutoff_time
-                if is_recent:
-                    recent += 1
-                articles.append({
-                    "title": entry.get("title", "(no title)"),
-                    "link": entry.get("link", ""),
-                    "date": pub_date.strftime("%m-%d %H:%M"),
-                    "recent": is_recent,
-                })
-            else:
-                articles.append({
-                    "title": entry.get("title", "(no title)"),
-                    "link": entry.get("link", ""),
-                    "date": "??-?? ??:??",
-                    "recent": False,
-                })
-
-        return {
-            "ok": True,
-            "title": feed.feed.get("title", "(no title)"),
-            "total": len(feed.entries),
-            "recent": recent,
-            "articles": articles,
-        }
-    except Exception as e:
-        return {"ok": False, "error": str(e)}
+    # parse_feed also skips re-parsing a body it has already parsed (304s).
+    feed = parse_feed(body, headers)
+
+    if feed.bozo and not feed.entries:
+        return {"ok": False, "error": str(feed.bozo_exception)}
+
+    recent = 0
+    articles = []
+    for entry in feed.entries:
+        parsed = dict.get(entry, "published_parsed") or dict.get(entry, "updated_parsed")
+        if parsed:
+            is_recent = parsed[:6] >= cutoff_tuple
+            if is_recent:
+                recent += 1
+            articles.append({
+                "title": entry.get("title", "(no title)"),
+                "link": entry.get("link", ""),
+                "date": f"{parsed.tm_mon:02d}-{parsed.tm_mday:02d} {parsed.tm_hour:02d}:{parsed.tm_min:02d}",
+                "recent": is_recent,
+            })
+        else:
+            articles.append({
+                "title": entry.get("title", "(no title)"),
+                "link": entry.get("link", ""),
+                "date": "??-?? ??:??",
+                "recent": False,
+            })
+
+    return {
+        "ok": True,
+        "title": feed.feed.get("title", "(no title)"),
+        "total": len(feed.entries),
+        "recent": recent,
+        "articles": articles,
+    }
 
 
 def main():
@@ -69,23 +68,46 @@ def main():
     total_feeds = 0
     failed_feeds = 0
 
+    # Download every feed concurrently but parse on this thread as each one
+    # completes, like the pipeline: only network waits overlap, so at most one
+    # parse tree is alive at a time. Results print in config order below.
+    # dict.fromkeys: a URL listed under several categories is fetched once.
+    all_urls = list(dict.fromkeys(url for urls in RSS_SOURCES.values() for url in urls))
+    results = {}
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
+        # revalidate: this script checks reachability, so always ask the server.
+        futures = {
+            executor.submit(_download_feed, url, revalidate=True): url
+            for url in all_urls
+        }
+        for future in as_completed(futures):
+            url = futures[future]
+            try:
+                results[url] = summarize_feed(*future.result())
+            except Exception as e:
+                results[url] = {"ok": False, "error": str(e)}
+
+    # Feeds list every entry (hundreds of lines): build the report and write it once.
+    lines = []
+    out = lines.append
     for category, urls in RSS_SOURCES.items():
-        print(f"── {category}")
+        out(f"── {category}")
         for url in urls:
             total_feeds += 1
-            result = test_feed(url)
+            result = results[url]
             if result["ok"]:
-                print(f"   ✅  {result['title']}")
-                print(f"       {result['recent']} recent / {result['total']} total  ({url})")
+                out(f"   ✅  {result['title']}")
+                out(f"       {result['recent']} recent / {result['total']} total  ({url})")
                 for art in result["articles"]:
                     flag = "🆕" if art["recent"] else "  "
-                    print(f"       {flag} [{art['date']}] {art['title']}")
-                    print(f"              {art['link']}")
+                    out(f"       {flag} [{art['date']}] {art['title']}")
+                    out(f"              {art['link']}")
             else:
                 failed_feeds += 1
-                print(f"   ❌  {url}")
-                print(f"       Error: {result['error']}")
-        print()
+                out(f"   ❌  {url}")
+                out(f"       Error: {result['error']}")
+        out("")
+    print("\n".join(lines))
 
     print(f"Result: {total_feeds - failed_feeds}/{total_feeds} feeds OK")
 
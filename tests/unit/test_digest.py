@@ -53,6 +53,32 @@ class TestResolveReferences:
         assert len(sections[0]['items']) == 0
         assert 'out of range' in capsys.readouterr().out
 
+    def test_zero_ref_out_of_range_and_negative_ref_invalid(self, all_articles, capsys):
+        parsed = {'sections': [
+            {'category': '国际政治', 'items': [
+                {'ref': '0', 'title_zh': '标题', 'summary_zh': '摘要'},
+                {'ref': '-1', 'title_zh': '标题', 'summary_zh': '摘要'},
+            ]},
+        ]}
+        sections = resolve_references(parsed, all_articles)
+        assert sections[0]['items'] == []
+        output = capsys.readouterr().out
+        assert 'Ref 0 out of range' in output
+        assert 'Invalid ref: -1' in output
+
+    def test_integer_and_padded_refs_accepted(self, all_articles):
+        parsed = {'sections': [
+            {'category': '科技与AI', 'items': [
+                {'ref': 2, 'title_zh': '标题', 'summary_zh': '摘要'},
+                {'ref': ' 4 ', 'title_zh': '标题', 'summary_zh': '摘要'},
+            ]},
+        ]}
+        sections = resolve_references(parsed, all_articles)
+        assert [i['link'] for i in sections[0]['items']] == [
+            'https://example.com/2',
+            'https://example.com/4',
+        ]
+
     def test_invalid_ref_skipped(self, all_articles, capsys):
         parsed = {'sections': [
             {'category': '科技与AI', 'items': [
@@ -89,6 +115,15 @@ class TestResolveReferences:
         sections = resolve_references(parsed, all_articles)
         assert sections[0]['items'][0]['link'] == 'https://example.com/2'
 
+    def test_legacy_colon_ref_with_space(self, all_articles):
+        parsed = {'sections': [
+            {'category': '科技与AI', 'items': [
+                {'ref': 'Tech: 3', 'title_zh': '标题', 'summary_zh': '摘要'},
+            ]},
+        ]}
+        sections = resolve_references(parsed, all_articles)
+        assert sections[0]['items'][0]['link'] == 'https://example.com/3'
+
     def test_empty_sections(self, all_articles):
         parsed = {'sections': []}
         sections = resolve_references(parsed, all_articles)
@@ -0,0 +1,58 @@
+import pytest
+
+from core import feed_cache
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(feed_cache, 'CACHE_DIR', tmp_path / 'rss_cache')
+    return tmp_path / 'rss_cache'
+
+
+def test_round_trip_keeps_body_validators_and_headers():
+    feed_cache.save_cached_feed(
+        'https://example.com/feed.xml', b'<rss/>', {'content-type': 'text/xml'},
+        etag='"abc"', last_modified='Wed, 01 Jan 2025 00:00:00 GMT',
+    )
+
+    cached = feed_cache.load_cached_feed('https://example.com/feed.xml')
+
+    assert cached['body'] == b'<rss/>'
+    assert cached['etag'] == '"abc"'
+    assert cached['last_modified'] == 'Wed, 01 Jan 2025 00:00:00 GMT'
+    assert cached['headers'] == {'content-type': 'text/xml'}
+
+
+def test_missing_entry_returns_none():
+    assert feed_cache.load_cached_feed('https://example.com/never-cached.xml') is None
+
+
+def test_fresh_until_ttl_expires(monkeypatch):
+    feed_cache.save_cached_feed('https://example.com/feed.xml', b'<rss/>', {})
+    cached = feed_cache.load_cached_feed('https://example.com/feed.xml')
+
+    assert feed_cache.is_fresh(cached)
+    monkeypatch.setattr(feed_cache, 'FRESH_SECONDS', 0)
+    assert not feed_cache.is_fresh(cached)
+
+
+def test_touch_restarts_freshness_and_keeps_body(monkeypatch):
+    feed_cache.save_cached_feed('https://example.com/feed.xml', b'<rss/>', {}, etag='"x"')
+    cached = feed_cache.load_cached_feed('https://example.com/feed.xml')
+    cached['fetched_at'] = 0
+    assert not feed_cache.is_fresh(cached)
+
+    feed_cache.touch_cached_feed('https://example.com/feed.xml', cached)
+
+    touched = feed_cache.load_cached_feed('https://example.com/feed.xml')
+    assert feed_cache.is_fresh(touched)
+    assert touched['body'] == b'<rss/>'
+    assert touched['etag'] == '"x"'
+
+
+def test_corrupt_metadata_treated_as_miss(cache_dir):
+    feed_cache.save_cached_feed('https://example.com/feed.xml', b'<rss/>', {}, etag='"x"')
+    for meta in cache_dir.glob('*.json'):
+        meta.write_text('{not json', encoding='utf-8')
+
+    assert feed_cache.load_cached_feed('https://example.com/feed.xml') is None
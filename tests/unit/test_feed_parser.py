@@ -0,0 +1,222 @@
+import html
+
+import feedparser
+import pytest
+
+from core import feed_cache, feed_parser
+from core.rss import _clean_summary, extract_image_url
+
+RSS2 = b'''<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:media="http://search.yahoo.com/mrss/"
+     xmlns:content="http://purl.org/rss/1.0/modules/content/">
+  <channel>
+    <title>World news | The Guardian</title>
+    <item>
+      <title>Ceasefire talks &amp; aid</title>
+      <link>https://example.com/a</link>
+      <pubDate>Tue, 14 Oct 2025 09:30:00 +0200</pubDate>
+      <description><![CDATA[<p>Talks resumed.</p>]]></description>
+      <media:content url="https://example.com/small.jpg" width="140"/>
+      <media:content url="https://example.com/large.jpg" width="460"/>
+    </item>
+    <item>
+      <title>Rover finds clay</title>
+      <link>https://example.com/b</link>
+      <pubDate>Tue, 14 Oct 2025 06:00:00 GMT</pubDate>
+      <content:encoded><![CDATA[<img src="https://example.com/clay.png"/>]]></content:encoded>
+    </item>
+  </channel>
+</rss>'''
+
+ATOM = b'''<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom" xmlns:media="http://search.yahoo.com/mrss/" xml:lang="en-US">
+  <title type="text">The Verge</title>
+  <updated>2025-10-14T12:00:00-04:00</updated>
+  <entry>
+    <published>2025-10-14T08:00:00-04:00</published>
+    <updated>2025-10-14T09:15:00-04:00</updated>
+    <title type="html"><![CDATA[AT&amp;T&#8217;s new plan &amp; more]]></title>
+    <content type="html"><![CDATA[<figure><img alt="" src="https://example.com/att.jpg" /></figure><p>Faster &amp; cheaper.</p>]]></content>
+    <link rel="alternate" type="text/html" href="https://example.com/att" />
+    <id>https://example.com/att</id>
+    <summary type="html"><![CDATA[The carrier reshuffles its tiers.]]></summary>
+  </entry>
+  <entry>
+    <updated>2025-10-14T10:00:00Z</updated>
+    <title>Plain &amp; simple</title>
+    <link rel="self" href="https://example.com/self" />
+    <link href="https://example.com/plain" />
+    <content type="html">&lt;p&gt;Only content.&lt;/p&gt;</content>
+    <media:thumbnail url="https://example.com/thumb.jpg" />
+  </entry>
+</feed>'''
+RDF = b'''<?xml version="1.0" encoding="UTF-8"?>
+<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" xmlns="http://purl.org/rss/1.0/"
+         xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:content="http://purl.org/rss/1.0/modules/content/">
+  <channel rdf:about="https://www.nature.com/nature.rss">
+    <title>Nature</title>
+    <items><rdf:Seq><rdf:li rdf:resource="https://example.com/n1"/></rdf:Seq></items>
+  </channel>
+  <item rdf:about="https://example.com/n1">
+    <title><![CDATA[Clay & water on Mars]]></title>
+    <link>https://example.com/n1</link>
+    <content:encoded><![CDATA[<p>Nature, Published online: 14 October 2025</p>Scientists report.]]></content:encoded>
+    <dc:title><![CDATA[Clay &amp; water on Mars]]></dc:title>
+    <dc:date>2025-10-14</dc:date>
+  </item>
+  <item rdf:about="https://example.com/n2">
+    <title>Ancient genomes</title>
+    <link>https://example.com/n2</link>
+    <description>Short abstract.</description>
+    <dc:date>2025-10-13T22:15:00+01:00</dc:date>
+  </item>
+</rdf:RDF>'''
+HEADERS = {'content-location': 'https://example.com/feed.xml', 'content-type': 'application/xml'}
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(feed_cache, 'CACHE_DIR', tmp_path / 'rss_cache')
+
+
+def test_fast_path_matches_feedparser_for_used_fields():
+    fast = feed_parser._parse_fast(RSS2)
+    slow = feedparser.parse(RSS2)
+
+    assert fast is not None
+    assert fast.feed.title == slow.feed.title
+    assert len(fast.entries) == len(slow.entries)
+    for f, s in zip(fast.entries, slow.entries):
+        assert f.title == s.title
+        assert f.link == s.link
+        assert tuple(f.published_parsed[:6]) == tuple(s.published_parsed[:6])
+        assert _clean_summary(f.get('summary', '')) == _clean_summary(s.get('summary', ''))
+        assert extract_image_url(f) == extract_image_url(s)
+
+
+def test_atom_fast_path_matches_feedparser_for_used_fields():
+    fast = feed_parser._parse_fast(ATOM)
+    slow = feedparser.parse(ATOM, sanitize_html=False)
+
+    assert fast is not None
+    assert fast.feed.title == slow.feed.title
+    assert len(fast.entries) == len(slow.entries)
+    for f, s in zip(fast.entries, slow.entries):
+        assert html.unescape(f.title) == html.unescape(s.title)
+        assert f.link == s.link
+        assert f.get('published_parsed') == dict.get(s, 'published_parsed')
+        assert f.get('updated_parsed') == dict.get(s, 'updated_parsed')
+        assert _clean_summary(f.get('summary', '')) == _clean_summary(s.get('summary', ''))
+        assert extract_image_url(f) == extract_image_url(s)
+
+
+def test_rdf_fast_path_matches_feedparser_for_used_fields():
+    fast = feed_parser._parse_fast(RDF)
+    slow = feedparser.parse(RDF, sanitize_html=False)
+
+    assert fast is not None
+    assert fast.feed.title == slow.feed.title
+    assert len(fast.entries) == len(slow.entries)
+    for f, s in zip(fast.entries, slow.entries):
+        assert f.title == s.title
+        assert f.link == s.link
+        assert f.get('published_parsed') == dict.get(s, 'published_parsed')
+        assert f.get('updated_parsed') == dict.get(s, 'updated_parsed')
+        assert _clean_summary(f.get('summary', '')) == _clean_summary(s.get('summary', ''))
+        assert extract_image_url(f) == extract_image_url(s)
+
+
+@pytest.mark.parametrize('body, absolute, relative, expected', [
+    (RSS2, b'<link>https://example.com/b</link>', b'<link>/x/y</link>', 'https://example.com/x/y'),
+    (ATOM, b'<link href="https://example.com/plain" />', b'<link href="/posts/a" />',
+     'https://example.com/posts/a'),
+    (ATOM, b'<link href="https://example.com/plain" />',
+     b'<link xml:base="https://other.example/blog/" href="posts/a" />', 'https://other.example/blog/posts/a'),
+    (RDF, b'<link>https://example.com/n2</link>', b'<link>n2</link>', 'https://example.com/n2'),
+])
+def test_relative_link_is_resolved_like_feedparser(body, absolute, relative, expected):
+    body = body.replace(absolute, relative)
+
+    parsed = feed_parser.parse_feed(body, HEADERS)
+    slow = feedparser.parse(body, response_headers=HEADERS, sanitize_html=False)
+
+    assert parsed.entries[1].link == slow.entries[1].link == expected
+
+
+def test_unknown_root_falls_back_to_feedparser(monkeypatch):
+    rdf = b'<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"/>'
+    seen = {}
+
+    def fake_parse(body, **kwargs):
+        seen['kwargs'] = kwargs
+        return 'feedparser result'
+
+    monkeypatch.setattr(feed_parser.feedparser, 'parse', fake_parse)
+
+    assert feed_parser.parse_feed(rdf, {'content-type': 'application/rdf+xml'}) == 'feedparser result'
+    assert seen['kwargs']['sanitize_html'] is False
+    assert seen['kwargs']['resolve_relative_uris'] is False
+    assert seen['kwargs']['response_headers'] == {'content-type': 'application/rdf+xml'}
+
+
+def test_xhtml_atom_content_falls_back():
+    xhtml = ATOM.replace(
+        b'<content type="html">',
+        b'<summary type="xhtml"><div xmlns="http://www.w3.org/1999/xhtml"><p>Hi</p></div></summary><content type="html">',
+    )
+    assert feed_parser._parse_fast(xhtml) is None
+
+
+def test_unparseable_date_or_xml_falls_back():
+    bad_date = RSS2.replace(b'Tue, 14 Oct 2025 06:00:00 GMT', b'yesterday-ish')
+    assert feed_parser._parse_fast(bad_date) is None
+    assert feed_parser._parse_fast(b'<rss><channel><title>&nbsp;</title></channel></rss>') is None
+    assert feed_parser._parse_fast(b'not xml at all') is None
+
+
+@pytest.mark.parametrize('body', [RSS2, ATOM, RDF])
+def test_unchanged_body_is_served_from_parse_cache(monkeypatch, body):
+    first = feed_parser.parse_feed(body, HEADERS)
+
+    def fail(*args, **kwargs):
+        raise AssertionError('body should not be re-parsed')
+
+    monkeypatch.setattr(feed_parser, '_parse_fast', fail)
+    monkeypatch.setattr(feed_parser.feedparser, 'parse', fail)
+    second = feed_parser.parse_feed(body, HEADERS)
+
+    assert second.feed.title == first.feed.title
+    assert len(second.entries) == len(first.entries)
+    for c, f in zip(second.entries, first.entries):
+        assert c.title == f.title
+        assert c.link == f.link
+        assert c.get('published_parsed') == f.get('published_parsed')
+        assert dict.get(c, 'updated_parsed') == dict.get(f, 'updated_parsed')
+        assert _clean_summary(c.get('summary', '')) == _clean_summary(f.get('summary', ''))
+        assert extract_image_url(c) == extract_image_url(f)
+
+
+def test_parse_cached_by_older_parser_version_is_redone(monkeypatch):
+    monkeypatch.setattr(feed_parser, '_PARSE_VERSION', 1)
+    feed_parser.parse_feed(RSS2, HEADERS)
+    monkeypatch.setattr(feed_parser, '_PARSE_VERSION', 2)
+    calls = []
+    real_parse_fast = feed_parser._parse_fast
+
+    def counting_parse_fast(body):
+        calls.append(body)
+        return real_parse_fast(body)
+
+    monkeypatch.setattr(feed_parser, '_parse_fast', counting_parse_fast)
+    feed_parser.parse_feed(RSS2, HEADERS)
+
+    assert calls == [RSS2]
+
+
+def test_changed_body_is_parsed_again():
+    feed_parser.parse_feed(RSS2, HEADERS)
+    changed = RSS2.replace(b'Rover finds clay', b'Rover finds water')
+
+    parsed = feed_parser.parse_feed(changed, HEADERS)
+
+    assert parsed.entries[1].title == 'Rover finds water'
@@ -1,7 +1,11 @@
 import json
 from io import BytesIO
 from pathlib import Path
+from types import SimpleNamespace
 
+import anthropic
+import boto3
+import httpx
 import pytest
 
 from core import llm_client
@@ -10,7 +14,7 @@ from core import llm_client
 def test_parse_digest_text_repairs_and_normalizes():
     text = '[{"category": "科技与AI", "items": []}]'
 
-    assert json.loads(llm_client._parse_digest_text(text, 'test')) == {
+    assert llm_client._parse_digest_text(text, 'test') == {
         'sections': [{'category': '科技与AI', 'items': []}],
     }
 
@@ -22,6 +26,23 @@ def test_generate_summary_requires_backend(monkeypatch):
         llm_client.generate_summary({})
 
 
+def test_llm_cache_reuses_digest_for_identical_prompt(monkeypatch, tmp_path):
+    calls = []
+    monkeypatch.setattr(llm_client, 'LLM_CACHE', True)
+    monkeypatch.setattr(llm_client, '_LLM_CACHE_DIR', tmp_path)
+    monkeypatch.setattr(llm_client, 'BACKEND', 'CODEX_CLI')
+    monkeypatch.setattr(llm_client, '_call_backend', lambda prompt: calls.append(prompt) or {'sections': []})
+    article = {'title': 'Chip export rules', 'source': 'Reuters', 'summary': 'New limits.'}
+
+    first = llm_client.generate_summary({'Tech & AI': [article]})
+    second = llm_client.generate_summary({'Tech & AI': [article]})
+    llm_client.generate_summary({'Tech & AI': [{**article, 'title': 'Other story'}]})
+
+    assert first == second == {'sections': []}
+    assert len(calls) == 2
+    assert len(list(tmp_path.glob('*.json'))) == 2
+
+
 def test_model_for_codex_cli_defaults_to_mini(monkeypatch):
     monkeypatch.setattr(llm_client, 'MODEL', None)
 
@@ -49,7 +70,7 @@ def test_call_codex_cli_uses_exec_output_file(monkeypatch):
     monkeypatch.setattr(llm_client.shutil, 'which', fake_which)
     monkeypatch.setattr(llm_client.subprocess, 'run', fake_run)
 
-    assert llm_client._call_codex_cli('生成摘要', 'gpt-test') == '{"sections": []}'
+    assert llm_client._call_codex_cli('生成摘要', 'gpt-test') == {'sections': []}
 
     command = seen['command']
     assert command[:2] == ['/usr/local/bin/codex', 'exec']
@@ -60,6 +81,39 @@ def test_call_codex_cli_uses_exec_output_file(monkeypatch):
     assert seen['kwargs']['stdin'] is llm_client.subprocess.DEVNULL
 
 
+def _tool_message(tool_input, stop_reason='tool_use'):
+    block = SimpleNamespace(type='tool_use', name='emit_digest', input=tool_input)
+    return SimpleNamespace(stop_reason=stop_reason, content=[block])
+
+
+def test_call_claude_api_forces_digest_tool(monkeypatch):
+    seen = {}
+
+    class Messages:
+        def create(self, **kwargs):
+            seen.update(kwargs)
+            return _tool_message({'sections': [{'category': '科技与AI', 'items': []}], 'market_pulse': None})
+
+    monkeypatch.setattr(llm_client, '_get_anthropic_client', lambda: SimpleNamespace(messages=Messages()))
+
+    result = llm_client._call_claude_api('生成摘要', 'claude-test')
+
+    assert result == {'sections': [{'category': '科技与AI', 'items': []}], 'market_pulse': None}
+    assert seen['tools'][0]['name'] == 'emit_digest'
+    assert seen['tool_choice'] == {'type': 'tool', 'name': 'emit_digest'}
+    assert seen['messages'] == [{'role': 'user', 'content': '生成摘要'}]
+
+
+def test_digest_from_tool_use_rejects_truncated_output():
+    with pytest.raises(ValueError, match='max_tokens'):
+        llm_client._digest_from_tool_use(_tool_message({'sections': []}, stop_reason='max_tokens'))
+
+
+def test_digest_from_tool_use_rejects_malformed_sections():
+    with pytest.raises(ValueError):
+        llm_client._digest_from_tool_use(_tool_message({'sections': 'oops'}))
+
+
 def test_call_bedrock_claude_invokes_messages_api(monkeypatch):
     seen = {}
 
@@ -81,10 +135,10 @@ def test_call_bedrock_claude_invokes_messages_api(monkeypatch):
         seen['client_kwargs'] = kwargs
         return Client()
 
-    monkeypatch.setattr(llm_client.boto3, 'client', fake_client)
+    monkeypatch.setattr(boto3, 'client', fake_client)
     monkeypatch.setattr(llm_client, 'AWS_REGION', 'us-east-1')
 
-    assert llm_client._call_bedrock_claude('生成摘要', 'bedrock-test-model') == '{"sections": []}'
+    assert llm_client._call_bedrock_claude('生成摘要', 'bedrock-test-model') == {'sections': []}
 
     assert seen['service_name'] == 'bedrock-runtime'
     assert seen['client_kwargs']['region_name'] == 'us-east-1'
@@ -98,3 +152,80 @@ def test_call_bedrock_claude_invokes_messages_api(monkeypatch):
     assert body['messages'] == [
         {'role': 'user', 'content': [{'type': 'text', 'text': '生成摘要'}]},
     ]
+
+
+def test_build_prompt_numbers_articles_per_category_and_skips_empty():
+    article = {'title': 'Chip export rules', 'source': 'Reuters', 'summary': 'New limits.'}
+    prompt = llm_client._build_prompt(
+        {'Tech & AI': [article, article], 'Global Affairs': []},
+        [],
+        '',
+    )
+
+    assert '## Tech & AI\n\n[1] Chip export rules | Reuters\nNew limits.\n\n[2] Chip export rules' in prompt
+    assert '## Global Affairs' not in prompt
+    assert '$articles' not in prompt
+    assert 'market_pulse 设为 null' in prompt
+
+
+def test_build_prompt_does_not_substitute_placeholders_inside_articles():
+    article = {'title': 'Literal $stock_block', 'source': 'Src', 'summary': 'x'}
+    prompt = llm_client._build_prompt({'Tech & AI': [article]}, [], '')
+
+    assert 'Literal $stock_block' in prompt
+    assert prompt.count('(今日无股市数据') == 1
+
+
+def test_anthropic_client_created_once(monkeypatch):
+    created = []
+    monkeypatch.setattr(llm_client, '_anthropic_client', None)
+    monkeypatch.setattr(anthropic, 'Anthropic', lambda **kwargs: created.append(kwargs) or object())
+
+    first = llm_client._get_anthropic_client()
+
+    assert llm_client._get_anthropic_client() is first
+    assert len(created) == 1
+
+
+def test_retry_delay_backs_off_exponentially_with_cap(monkeypatch):
+    monkeypatch.setattr(llm_client.random, 'uniform', lambda a, b: 0)
+
+    assert [llm_client._retry_delay(n) for n in (1, 2, 3)] == [1, 2, 4]
+    assert llm_client._retry_delay(10) == llm_client._RETRY_MAX_DELAY
+
+
+def test_retry_delay_honors_rate_limit_retry_after():
+    request = httpx.Request('POST', 'https://api.anthropic.com/v1/messages')
+    response = httpx.Response(429, headers={'retry-after': '7'}, request=request)
+    err = anthropic.RateLimitError('rate limited', response=response, body=None)
+
+    assert llm_client._retry_delay(1, err) == 7
+
+
+def test_backend_sdks_are_not_imported_with_the_module():
+    import subprocess
+    import sys
+
+    code = 'import sys; import core.llm_client; print("anthropic" in sys.modules, "boto3" in sys.modules)'
+    src = Path(__file__).resolve().parents[2] / 'src'
+    out = subprocess.run([sys.executable, '-c', code], cwd=src, capture_output=True, text=True, check=True)
+
+    assert out.stdout.split() == ['False', 'False']
+
+
+def test_cli_retry_sleeps_between_attempts(monkeypatch):
+    sleeps = []
+
+    class Failed:
+        returncode = 1
+        stdout = ''
+        stderr = 'overloaded'
+
+    monkeypatch.setattr(llm_client, 'MAX_RETRIES', 2)
+    monkeypatch.setattr(llm_client.subprocess, 'run', lambda *a, **k: Failed())
+    monkeypatch.setattr(llm_client.time, 'sleep', sleeps.append)
+
+    with pytest.raises(ValueError, match='Claude CLI failed after 2 attempts'):
+        llm_client._call_claude_cli('生成摘要', 'haiku')
+
+    assert len(sleeps) == 1
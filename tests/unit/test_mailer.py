@@ -0,0 +1,117 @@
+import email
+
+from core import mailer
+
+
+def test_build_message_is_single_part_utf8_html(monkeypatch):
+    monkeypatch.setattr(mailer, 'GMAIL_USER', 'sender@example.com')
+
+    msg = mailer._build_message('📰 每日新闻摘要', '<p>你好</p>')
+    msg_id = mailer._address(msg, 'to@example.com')
+
+    assert not msg.is_multipart()
+    assert msg.get_content_type() == 'text/html'
+    assert msg['Message-ID'] == msg_id
+    assert msg['From'] == 'sender@example.com'
+    assert msg['To'] == 'to@example.com'
+    parsed = email.message_from_bytes(msg.as_bytes())
+    assert parsed.get_payload(decode=True).decode('utf-8') == '<p>你好</p>'
+
+
+def test_address_retargets_message_without_duplicate_headers():
+    msg = mailer._build_message('subject', '<p>body</p>')
+    payload = msg.get_payload()
+
+    first = mailer._address(msg, 'a@example.com')
+    second = mailer._address(msg, 'b@example.com')
+
+    assert first != second
+    assert msg.get_all('To') == ['b@example.com']
+    assert msg.get_all('Message-ID') == [second]
+    assert msg.get_payload() is payload
+
+
+class _FakeSMTP:
+    instances = []
+
+    def __init__(self, host, port):
+        self.logins = 0
+        self.sent = []
+        _FakeSMTP.instances.append(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def login(self, user, password):
+        self.logins += 1
+
+    def send_message(self, msg, from_addr, to_addrs):
+        assert msg['To'] == to_addrs[0]
+        self.sent.append(to_addrs)
+
+
+def test_smtp_send_logs_in_once_for_all_recipients(monkeypatch):
+    _FakeSMTP.instances = []
+    monkeypatch.setattr(mailer.smtplib, 'SMTP_SSL', _FakeSMTP)
+    monkeypatch.setattr(mailer, 'GMAIL_CLIENT_ID', None)
+    monkeypatch.setattr(mailer, 'GMAIL_USER', 'sender@example.com')
+    monkeypatch.setattr(mailer, 'GMAIL_APP_PASSWORD', 'app-password')
+
+    ids = mailer.send_email_gmail('a', '<p>a</p>', ['x@example.com', 'y@example.com'])
+
+    assert len(ids) == 2
+    assert len(_FakeSMTP.instances) == 1
+    server = _FakeSMTP.instances[0]
+    assert server.logins == 1
+    assert server.sent == [['x@example.com'], ['y@example.com']]
+
+
+class _FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+class _FakeSession:
+    instances = []
+
+    def __init__(self):
+        self.headers = {}
+        self.posts = []
+        _FakeSession.instances.append(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def post(self, url, **kwargs):
+        self.posts.append(url)
+        if 'token' in url:
+            return _FakeResponse({'access_token': 'token'})
+        return _FakeResponse({'id': f'id-{len(self.posts)}'})
+
+
+def test_api_sends_share_one_https_session(monkeypatch):
+    _FakeSession.instances = []
+    monkeypatch.setattr(mailer.requests, 'Session', _FakeSession)
+    monkeypatch.setattr(mailer, 'GMAIL_CLIENT_ID', 'id')
+    monkeypatch.setattr(mailer, 'GMAIL_CLIENT_SECRET', 'secret')
+    monkeypatch.setattr(mailer, 'GMAIL_REFRESH_TOKEN', 'refresh')
+
+    ids = mailer.send_email_gmail('a', '<p>a</p>', ['x@example.com', 'y@example.com'])
+
+    assert ids == ['id-2', 'id-3']
+    assert len(_FakeSession.instances) == 1
+    session = _FakeSession.instances[0]
+    assert session.headers['Authorization'] == 'Bearer token'
+    assert session.posts[0] == 'https://oauth2.googleapis.com/token'
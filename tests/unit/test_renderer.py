@@ -67,6 +67,17 @@ class TestRenderBody:
         assert '<script>' not in body
         assert html.escape('<script>alert("xss")</script>') in body
 
+    def test_link_and_image_urls_are_escaped(self):
+        items = [{
+            'title_zh': '标题', 'summary_zh': '摘要',
+            'link': 'https://example.com/a?b=1&c="2"', 'title': 'Test',
+            'source': 'Src', 'published': '2025-01-01',
+            'image_url': 'https://example.com/i.jpg?w=1&h=2',
+        }]
+        body = _render_body([_make_section(items=items)])
+        assert 'href="https://example.com/a?b=1&amp;c=&quot;2&quot;"' in body
+        assert 'src="https://example.com/i.jpg?w=1&amp;h=2"' in body
+
     def test_empty_sections(self):
         body = _render_body([])
         assert body == ''
@@ -86,6 +97,11 @@ class TestBuildEmailHtml:
         result = build_email_html_from_json([])
         assert '$body_html' not in result
 
+    def test_placeholder_text_inside_articles_is_left_alone(self):
+        section = _make_section(items=[dict(_make_section()['items'][0], summary_zh='costs $date_str')])
+        result = build_email_html_from_json([section])
+        assert 'costs $date_str' in result
+
     def test_includes_market_pulse_before_news(self):
         result = build_email_html_from_json(
             [_make_section()],
@@ -150,6 +166,15 @@ class TestRenderMarketPulse:
         assert '▼ -0.20%' in body
         assert '0bp' in body
 
+    def test_flat_index_change_is_escaped_once(self):
+        body = _render_market_pulse_section(
+            [{'name': 'VIX', 'price': '15', 'direction': 'same', 'change_display': 'n/a <flat>'}],
+            None,
+        )
+
+        assert 'n/a &lt;flat&gt;' in body
+        assert '&amp;lt;' not in body
+
     def test_pulse_narrative_escapes_user_content_and_related_links(self):
         body = _render_market_pulse_section(
             [],
@@ -1,9 +1,11 @@
+import time
+
 import pytest
 from unittest.mock import MagicMock
 from datetime import datetime, timedelta, timezone
 from types import SimpleNamespace
 
-from core import rss
+from core import feed_cache, rss
 from core.rss import extract_image_url, _resolve_source_name, _clean_summary
 
 
@@ -19,6 +21,11 @@ def _time_tuple(dt):
     return dt.utctimetuple()
 
 
+def _fake_download(feed_url):
+    # Hand the URL through as the "body" so fake parsers can key on it.
+    return feed_url, {}
+
+
 class TestExtractImageUrl:
     def test_media_content(self):
         entry = MagicMock(spec=[])
@@ -50,6 +57,12 @@ class TestExtractImageUrl:
         entry.get = lambda k, d='': '<img src="https://example.com/sum.jpg" />' if k == 'summary' else d
         assert extract_image_url(entry) == 'https://example.com/sum.jpg'
 
+    def test_relative_img_src_is_resolved_against_entry_link(self):
+        entry = MagicMock(spec=[])
+        entry.content = [{'value': '<img src="/images/chip.jpg">'}]
+        entry.get = {'link': 'https://example.com/news/chip'}.get
+        assert extract_image_url(entry) == 'https://example.com/images/chip.jpg'
+
     def test_rejects_favicon(self):
         entry = MagicMock(spec=[])
         entry.media_content = [{'url': 'https://example.com/favicon.png'}]
@@ -62,6 +75,30 @@ class TestExtractImageUrl:
         entry.get = lambda k, d='': d
         assert extract_image_url(entry) is None
 
+    def test_rejects_uppercase_video_extension(self):
+        entry = MagicMock(spec=[])
+        entry.media_content = [{'url': 'https://example.com/clip.MP4'}]
+        entry.get = lambda k, d='': d
+        assert extract_image_url(entry) is None
+
+    def test_rejects_blocked_extension_before_query_string(self):
+        entry = MagicMock(spec=[])
+        entry.media_content = [{'url': 'https://example.com/logo.svg?v=2'}]
+        entry.get = lambda k, d='': d
+        assert extract_image_url(entry) is None
+
+    def test_accepts_image_with_query_string(self):
+        entry = MagicMock(spec=[])
+        entry.media_content = [{'url': 'https://example.com/photo.jpg?width=460&quality=85'}]
+        entry.get = lambda k, d='': d
+        assert extract_image_url(entry) == 'https://example.com/photo.jpg?width=460&quality=85'
+
+    def test_accepts_extension_only_as_substring(self):
+        entry = MagicMock(spec=[])
+        entry.media_content = [{'url': 'https://example.com/svg-diagram.png'}]
+        entry.get = lambda k, d='': d
+        assert extract_image_url(entry) == 'https://example.com/svg-diagram.png'
+
     def test_rejects_google_news_url(self):
         entry = MagicMock(spec=[])
         entry.media_content = [{'url': 'https://news.google.com/img.jpg'}]
@@ -164,13 +201,15 @@ class TestFetchRssArticles:
             ],
         }
 
-        def fake_parse(feed_url, agent):
+        def fake_parse(feed_url, headers):
             return SimpleNamespace(
+                bozo=False,
                 feed={'title': 'Example Feed'},
                 entries=feed_entries[feed_url],
             )
 
-        monkeypatch.setattr(rss.feedparser, 'parse', fake_parse)
+        monkeypatch.setattr(rss, '_download_feed', _fake_download)
+        monkeypatch.setattr(rss, 'parse_feed', fake_parse)
 
         articles = rss.fetch_rss_articles(
             'Tech & AI',
@@ -190,11 +229,33 @@ class TestFetchRssArticles:
         assert 'Third skipped by per-feed limit' not in [a['title'] for a in articles]
         assert 'Old skipped' not in [a['title'] for a in articles]
 
+    def test_keeps_recent_entries_after_an_old_one(self, monkeypatch):
+        # Some feeds (e.g. NYT HomePage) are ordered by prominence, not time,
+        # so an out-of-window entry must not end the scan.
+        now = datetime.now(timezone.utc)
+        entries = [
+            _Entry({'title': 'Pinned old', 'link': 'https://example.com/old',
+                    'published_parsed': _time_tuple(now - timedelta(hours=72))}),
+            _Entry({'title': 'Fresh', 'link': 'https://example.com/fresh',
+                    'published_parsed': _time_tuple(now - timedelta(hours=1))}),
+        ]
+
+        def fake_parse(feed_url, headers):
+            return SimpleNamespace(bozo=False, feed={'title': 'Example Feed'}, entries=entries)
+
+        monkeypatch.setattr(rss, '_download_feed', _fake_download)
+        monkeypatch.setattr(rss, 'parse_feed', fake_parse)
+
+        articles = rss.fetch_rss_articles('Tech & AI', ['https://example.com/feed.xml'])
+
+        assert [a['title'] for a in articles] == ['Fresh']
+
     def test_uses_updated_parsed_when_published_missing(self, monkeypatch):
         now = datetime.now(timezone.utc)
 
-        def fake_parse(feed_url, agent):
+        def fake_parse(feed_url, headers):
             return SimpleNamespace(
+                bozo=False,
                 feed={'title': 'Updated Feed'},
                 entries=[_Entry({
                     'title': 'Updated Article',
@@ -204,7 +265,8 @@ class TestFetchRssArticles:
                 })],
             )
 
-        monkeypatch.setattr(rss.feedparser, 'parse', fake_parse)
+        monkeypatch.setattr(rss, '_download_feed', _fake_download)
+        monkeypatch.setattr(rss, 'parse_feed', fake_parse)
 
         articles = rss.fetch_rss_articles('Global Affairs', ['https://example.com/feed.xml'])
 
@@ -212,11 +274,287 @@ class TestFetchRssArticles:
         assert articles[0]['title'] == 'Updated Article'
         assert articles[0]['published']
 
+    def test_unparseable_published_date_falls_back_to_updated(self, monkeypatch):
+        now = datetime.now(timezone.utc)
+
+        def fake_parse(feed_url, headers):
+            return SimpleNamespace(
+                bozo=False,
+                feed={'title': 'Feed'},
+                entries=[
+                    _Entry({
+                        'title': 'Has updated',
+                        'link': 'https://example.com/updated',
+                        'published_parsed': None,
+                        'updated_parsed': _time_tuple(now - timedelta(hours=1)),
+                    }),
+                    _Entry({
+                        'title': 'No dates',
+                        'link': 'https://example.com/undated',
+                        'published_parsed': None,
+                    }),
+                ],
+            )
+
+        monkeypatch.setattr(rss, '_download_feed', _fake_download)
+        monkeypatch.setattr(rss, 'parse_feed', fake_parse)
+
+        articles = rss.fetch_rss_articles('Tech & AI', ['https://example.com/feed.xml'])
+
+        assert [a['title'] for a in articles] == ['Has updated']
+
     def test_parse_failure_skips_feed(self, monkeypatch, capsys):
-        def fake_parse(feed_url, agent):
+        def fake_parse(feed_url, headers):
             raise RuntimeError('boom')
 
-        monkeypatch.setattr(rss.feedparser, 'parse', fake_parse)
+        monkeypatch.setattr(rss, '_download_feed', _fake_download)
+        monkeypatch.setattr(rss, 'parse_feed', fake_parse)
 
         assert rss.fetch_rss_articles('Tech & AI', ['https://example.com/feed.xml']) == []
         assert 'Failed to fetch https://example.com/feed.xml' in capsys.readouterr().out
+
+    def test_bozo_feed_without_entries_is_skipped(self, monkeypatch, capsys):
+        def fake_parse(body, headers):
+            return SimpleNamespace(bozo=True, bozo_exception='not well-formed', feed={}, entries=[])
+
+        monkeypatch.setattr(rss, '_download_feed', _fake_download)
+        monkeypatch.setattr(rss, 'parse_feed', fake_parse)
+
+        assert rss.fetch_rss_articles('Tech & AI', ['https://example.com/feed.xml']) == []
+        assert 'Skipping unparseable feed https://example.com/feed.xml' in capsys.readouterr().out
+
+
+class TestFetchAllRssArticles:
+    def test_groups_by_category_and_isolates_failing_feed(self, monkeypatch, capsys):
+        now = datetime.now(timezone.utc)
+
+        def fake_parse(feed_url, headers):
+            if 'broken' in feed_url:
+                raise RuntimeError('boom')
+            return SimpleNamespace(
+                bozo=False,
+                feed={'title': feed_url},
+                entries=[_Entry({
+                    'title': f'From {feed_url}',
+                    'link': feed_url,
+                    'published_parsed': _time_tuple(now - timedelta(hours=1)),
+                    'summary': '',
+                })],
+            )
+
+        monkeypatch.setattr(rss, '_download_feed', _fake_download)
+        monkeypatch.setattr(rss, 'parse_feed', fake_parse)
+
+        results = rss.fetch_all_rss_articles({
+            'Tech & AI': ['https://a.example/feed', 'https://broken.example/feed'],
+            'Stock Market': ['https://b.example/feed'],
+        })
+
+        assert list(results) == ['Tech & AI', 'Stock Market']
+        assert [a['link'] for a in results['Tech & AI']] == ['https://a.example/feed']
+        assert [a['category'] for a in results['Stock Market']] == ['Stock Market']
+        assert 'Failed to fetch https://broken.example/feed' in capsys.readouterr().out
+
+    def test_output_order_follows_feed_order_not_completion_order(self, monkeypatch):
+        published = _time_tuple(datetime.now(timezone.utc) - timedelta(hours=1))
+
+        def slow_first_download(feed_url):
+            if 'slow' in feed_url:
+                time.sleep(0.05)
+            return feed_url, {}
+
+        def fake_parse(feed_url, headers):
+            return SimpleNamespace(
+                bozo=False,
+                feed={'title': feed_url},
+                entries=[_Entry({'title': feed_url, 'link': feed_url, 'published_parsed': published})],
+            )
+
+        monkeypatch.setattr(rss, '_download_feed', slow_first_download)
+        monkeypatch.setattr(rss, 'parse_feed', fake_parse)
+
+        results = rss.fetch_all_rss_articles({
+            'Tech & AI': ['https://slow.example/feed', 'https://fast.example/feed'],
+        })
+
+        assert [a['link'] for a in results['Tech & AI']] == [
+            'https://slow.example/feed',
+            'https://fast.example/feed',
+        ]
+
+    def test_feed_listed_in_two_categories_is_downloaded_once(self, monkeypatch):
+        published = _time_tuple(datetime.now(timezone.utc) - timedelta(hours=1))
+        downloads = []
+
+        def counting_download(feed_url):
+            downloads.append(feed_url)
+            return feed_url, {}
+
+        def fake_parse(feed_url, headers):
+            return SimpleNamespace(
+                bozo=False,
+                feed={'title': 'Shared'},
+                entries=[_Entry({'title': 'Shared story', 'link': feed_url, 'published_parsed': published})],
+            )
+
+        monkeypatch.setattr(rss, '_download_feed', counting_download)
+        monkeypatch.setattr(rss, 'parse_feed', fake_parse)
+
+        results = rss.fetch_all_rss_articles({
+            'Tech & AI': ['https://shared.example/feed'],
+            'Stock Market': ['https://shared.example/feed'],
+        })
+
+        assert downloads == ['https://shared.example/feed']
+        assert [a['category'] for a in results['Tech & AI']] == ['Tech & AI']
+        assert [a['category'] for a in results['Stock Market']] == ['Stock Market']
+
+
+class TestDownloadFeed:
+    @pytest.fixture(autouse=True)
+    def _isolated_cache(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(feed_cache, 'CACHE_DIR', tmp_path)
+
+    def test_returns_body_and_feedparser_headers(self, monkeypatch):
+        seen = {}
+
+        class FakeResponse:
+            status_code = 200
+            content = b'<rss/>'
+            url = 'https://example.com/final.xml'
+            headers = {'Content-Type': 'application/rss+xml; charset=utf-8'}
+
+            def raise_for_status(self):
+                pass
+
+        def fake_get(url, headers, timeout):
+            seen['timeout'] = timeout
+            return FakeResponse()
+
+        monkeypatch.setattr(rss._SESSION, 'get', fake_get)
+
+        body, headers = rss._download_feed('https://example.com/feed.xml')
+
+        assert body == b'<rss/>'
+        assert headers == {
+            'content-location': 'https://example.com/final.xml',
+            'content-type': 'application/rss+xml; charset=utf-8',
+        }
+        assert seen['timeout'] == rss._FETCH_TIMEOUT
+        assert rss._SESSION.headers['User-Agent'].startswith('Mozilla/5.0')
+
+    def test_retries_stay_bounded(self):
+        retry = rss._SESSION.get_adapter('https://example.com/feed.xml').max_retries
+
+        assert retry.respect_retry_after_header is False
+        assert (retry.connect, retry.read) == (1, 0)
+
+    def test_fresh_cache_skips_request(self, monkeypatch):
+        feed_cache.save_cached_feed('https://example.com/feed.xml', b'<rss>cached</rss>', {})
+
+        def fail_get(*args, **kwargs):
+            raise AssertionError('fresh cache should not hit the network')
+
+        monkeypatch.setattr(rss._SESSION, 'get', fail_get)
+
+        assert rss._download_feed('https://example.com/feed.xml') == (b'<rss>cached</rss>', {})
+
+    def test_revalidate_asks_server_even_when_fresh(self, monkeypatch):
+        feed_cache.save_cached_feed(
+            'https://example.com/feed.xml', b'<rss>cached</rss>', {}, etag='"v1"',
+        )
+        seen = {}
+
+        class NotModified:
+            status_code = 304
+
+        def fake_get(url, headers, timeout):
+            seen['headers'] = headers
+            return NotModified()
+
+        monkeypatch.setattr(rss._SESSION, 'get', fake_get)
+
+        body, _ = rss._download_feed('https://example.com/feed.xml', revalidate=True)
+
+        assert body == b'<rss>cached</rss>'
+        assert seen['headers'] == {'If-None-Match': '"v1"'}
+
+    def test_not_modified_reuses_cached_body(self, monkeypatch):
+        monkeypatch.setattr(feed_cache, 'FRESH_SECONDS', 0)
+        feed_cache.save_cached_feed(
+            'https://example.com/feed.xml', b'<rss>cached</rss>',
+            {'content-type': 'application/rss+xml'}, etag='"v1"',
+        )
+        seen = {}
+
+        class NotModified:
+            status_code = 304
+
+        def fake_get(url, headers, timeout):
+            seen['headers'] = headers
+            return NotModified()
+
+        monkeypatch.setattr(rss._SESSION, 'get', fake_get)
+
+        body, headers = rss._download_feed('https://example.com/feed.xml')
+
+        assert seen['headers']['If-None-Match'] == '"v1"'
+        assert 'If-Modified-Since' not in seen['headers']
+        assert body == b'<rss>cached</rss>'
+        assert headers == {'content-type': 'application/rss+xml'}
+
+
+class TestDedupeArticles:
+    def test_drops_repeat_links_and_titles_across_categories(self):
+        articles = {
+            'Global Affairs': [
+                {'title': 'Ceasefire talks resume in Cairo', 'link': 'https://bbc.com/a?at_medium=rss'},
+                {'title': 'Unrelated story', 'link': 'https://bbc.com/b'},
+            ],
+            'Business & Finance': [
+                {'title': 'Different headline', 'link': 'https://bbc.com/a#comments'},
+                {'title': 'Ceasefire Talks Resume in Cairo!', 'link': 'https://nyt.com/c'},
+                {'title': 'Oil slides', 'link': 'https://ft.com/d'},
+            ],
+        }
+
+        deduped = rss.dedupe_articles(articles)
+
+        assert [a['link'] for a in deduped['Global Affairs']] == [
+            'https://bbc.com/a?at_medium=rss',
+            'https://bbc.com/b',
+        ]
+        assert [a['link'] for a in deduped['Business & Finance']] == ['https://ft.com/d']
+
+    def test_keeps_empty_categories(self):
+        assert rss.dedupe_articles({'Tech & AI': []}) == {'Tech & AI': []}
+
+    def test_links_differing_in_a_real_query_parameter_are_kept(self):
+        articles = {
+            'Tech & AI': [
+                {'title': 'Chip export rules', 'link': 'https://example.com/article?id=123&utm_source=rss'},
+                {'title': 'Battery recycling', 'link': 'https://example.com/article?id=124'},
+                {'title': 'Chip rules, again', 'link': 'https://example.com/article?fbclid=x&id=123'},
+            ],
+        }
+
+        deduped = rss.dedupe_articles(articles)
+
+        assert [a['link'] for a in deduped['Tech & AI']] == [
+            'https://example.com/article?id=123&utm_source=rss',
+            'https://example.com/article?id=124',
+        ]
+
+    def test_headlines_sharing_a_long_prefix_are_kept(self):
+        prefix = 'Federal Reserve holds interest rates steady as officials weigh'
+        articles = {
+            'Business & Finance': [
+                {'title': f'{prefix} inflation data', 'link': 'https://a.example/1'},
+                {'title': f'{prefix} labour market', 'link': 'https://b.example/2'},
+            ],
+        }
+
+        deduped = rss.dedupe_articles(articles)
+
+        assert len(deduped['Business & Finance']) == 2
+